@@ -0,0 +1,89 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foods.models import Ingredient, IngredientRecipe, Recipe, Tag
+
+User = get_user_model()
+
+
+def image_file(name='recipe.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+class FoodgramTestCase(TestCase):
+    """Тесты с пустым кешем и временным каталогом медиа."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@foodgram.ru',
+            password='password',
+            first_name=username,
+            last_name=username
+        )
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user)}'
+        )
+        return client
+
+    @staticmethod
+    def create_tag(slug):
+        return Tag.objects.create(name=slug, slug=slug)
+
+    @staticmethod
+    def create_ingredient(name, measurement_unit='г'):
+        return Ingredient.objects.create(
+            name=name,
+            measurement_unit=measurement_unit
+        )
+
+    @staticmethod
+    def create_recipe(author, tags=(), ingredients=(), name='Рецепт'):
+        """Рецепт с тегами и парами (ингредиент, количество)."""
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text='Описание',
+            cooking_time=10,
+            image=image_file()
+        )
+        recipe.tags.set(tags)
+        for ingredient, amount in ingredients:
+            IngredientRecipe.objects.create(
+                recipe=recipe,
+                ingredient=ingredient,
+                amount=amount
+            )
+        return recipe
@@ -0,0 +1,117 @@
+from api.tests.base import FoodgramTestCase
+from foods.models import Favorite, IngredientRecipe
+
+
+class AnonymousRecipeCacheTest(FoodgramTestCase):
+    """Общий кеш чтения рецептов и его точечный сброс."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.tag = cls.create_tag('breakfast')
+        cls.ingredient = cls.create_ingredient('salt')
+        cls.recipe = cls.create_recipe(
+            cls.author,
+            tags=[cls.tag],
+            ingredients=[(cls.ingredient, 5)],
+            name='first'
+        )
+        cls.other = cls.create_recipe(cls.author, name='second')
+
+    def detail_url(self, recipe):
+        return f'/api/recipes/{recipe.pk}/'
+
+    def change(self, function, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            function(*args)
+
+    def test_anonymous_headers(self):
+        response = self.client.get('/api/recipes/')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/recipes/',
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_normalized(self):
+        self.client.get('/api/recipes/?limit=2&page=1')
+        with self.assertNumQueries(0):
+            self.client.get('/api/recipes/?page=1&limit=2')
+
+    def test_recipe_saved(self):
+        self.client.get(self.detail_url(self.recipe))
+        self.recipe.name = 'renamed'
+        self.change(self.recipe.save)
+        response = self.client.get(self.detail_url(self.recipe))
+        self.assertEqual(response.data['name'], 'renamed')
+
+    def test_other_recipe_saved(self):
+        self.client.get(self.detail_url(self.recipe))
+        self.other.name = 'renamed'
+        self.change(self.other.save)
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url(self.recipe))
+
+    def test_ingredients_changed(self):
+        self.client.get(self.detail_url(self.recipe))
+        self.change(
+            IngredientRecipe.objects.filter(recipe=self.recipe).get().delete
+        )
+        response = self.client.get(self.detail_url(self.recipe))
+        self.assertEqual(response.data['ingredients'], [])
+
+    def test_tags_changed(self):
+        url = f'/api/recipes/?tags={self.tag.slug}'
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        self.change(self.other.tags.add, self.tag)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+    def test_recipe_deleted(self):
+        self.client.get('/api/recipes/')
+        self.change(self.other.delete)
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipe.pk]
+        )
+
+    def test_pagination_after_create(self):
+        url = '/api/recipes/?limit=2'
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+        self.assertIsNone(response.data['next'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_recipe(self.author, name='third')
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_author_changed(self):
+        self.client.get(self.detail_url(self.recipe))
+        self.author.first_name = 'renamed'
+        self.change(self.author.save)
+        response = self.client.get(self.detail_url(self.recipe))
+        self.assertEqual(response.data['author']['first_name'], 'renamed')
+
+    def test_personalized_shared_entry(self):
+        user = self.create_user('reader')
+        client = self.client_for(user)
+        Favorite.objects.create(user=user, recipe=self.recipe)
+        self.client.get('/api/recipes/')
+        response = client.get('/api/recipes/')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(
+            {
+                recipe['id']: recipe['is_favorited']
+                for recipe in response.data['results']
+            },
+            {self.recipe.pk: True, self.other.pk: False}
+        )
+        response = self.client.get('/api/recipes/')
+        self.assertFalse(any(
+            recipe['is_favorited'] for recipe in response.data['results']
+        ))
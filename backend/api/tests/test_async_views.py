@@ -0,0 +1,66 @@
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+from django.urls import include, path
+
+from api.tests.base import FoodgramTestCase
+from api.v1.foods.async_views import ingredient_list, redirect_view, tag_list
+
+# Маршруты режима ASGI поверх обычного API.
+urlpatterns = [
+    path('api/tags/', tag_list),
+    path('api/ingredients/', ingredient_list),
+    path('api/', include('api.urls')),
+    path('s/<str:short_link>/', redirect_view),
+]
+
+
+class AsyncViewsTest(FoodgramTestCase):
+    """Асинхронные списки отдают то же, что и ViewSet."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_tag('breakfast')
+        cls.create_tag('dinner')
+        for name in ('Соль', 'соус', 'Сахар', 'Масло соленое'):
+            cls.create_ingredient(name)
+
+    def async_request(self, method, url, **extra):
+        async def request():
+            return await getattr(self.async_client, method)(url, **extra)
+
+        with override_settings(ROOT_URLCONF=__name__):
+            return async_to_sync(request)()
+
+    def test_tag_list(self):
+        expected = self.client.get('/api/tags/')
+        response = self.async_request('get', '/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+        response = self.async_request(
+            'get',
+            '/api/tags/',
+            if_none_match=expected['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_tag_list_warms_viewset_cache(self):
+        self.async_request('get', '/api/tags/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(len(response.json()), 2)
+
+    def test_ingredient_list(self):
+        for query in ('', '?name=со', '?name=СО&limit=2'):
+            with self.subTest(query=query):
+                url = f'/api/ingredients/{query}'
+                expected = self.client.get(url)
+                response = self.async_request('get', url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_redirect(self):
+        response = self.async_request('get', '/s/nolink/')
+        self.assertEqual(response.status_code, 404)
+        response = self.async_request('post', '/s/nolink/')
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from foods.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow, User
+
+
+class CountersTest(FoodgramTestCase):
+    """Денормализованные счетчики рецептов и пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.user = cls.create_user('reader')
+        cls.recipe = cls.create_recipe(cls.author)
+
+    def setUp(self):
+        super().setUp()
+        self.api = self.client_for(self.user)
+
+    def counters(self, instance, *fields):
+        values = type(instance).objects.values_list(*fields).get(
+            pk=instance.pk
+        )
+        return values[0] if len(values) == 1 else values
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        self.assertEqual(self.api.post(url).status_code, 201)
+        self.assertEqual(self.api.post(url).status_code, 400)
+        self.assertEqual(self.counters(self.recipe, 'favorites_count'), 1)
+        self.assertEqual(self.api.delete(url).status_code, 204)
+        self.assertEqual(self.api.delete(url).status_code, 400)
+        self.assertEqual(self.counters(self.recipe, 'favorites_count'), 0)
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        self.api.post(url)
+        self.api.post(url)
+        self.assertEqual(self.counters(self.recipe, 'carts_count'), 1)
+        self.api.delete(url)
+        self.assertEqual(self.counters(self.recipe, 'carts_count'), 0)
+
+    def test_batch(self):
+        other = self.create_recipe(self.author, name='second')
+        url = '/api/recipes/favorite/batch/'
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = self.api.post(
+            url,
+            {'add': [self.recipe.pk, other.pk]},
+            format='json'
+        )
+        self.assertEqual(
+            [item['status'] for item in response.data['add']],
+            ['exists', 'added']
+        )
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list(
+                'favorites_count', flat=True
+            )),
+            [1, 1]
+        )
+        self.api.post(
+            url,
+            {'remove': [self.recipe.pk, other.pk]},
+            format='json'
+        )
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list(
+                'favorites_count', flat=True
+            )),
+            [0, 0]
+        )
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_cascade_delete(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.user.delete()
+        self.assertEqual(self.counters(self.recipe, 'favorites_count'), 0)
+
+    def counter_updates(self, delete):
+        with CaptureQueriesContext(connection) as context:
+            delete()
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "foods_recipe"')
+        ]
+
+    def test_users_cascade_delete(self):
+        other = self.create_recipe(self.author, name='second')
+        readers = [self.create_user(f'reader{i}') for i in range(2)]
+        for user in (self.user, *readers):
+            for model in (Favorite, ShoppingCart):
+                model.objects.create(user=user, recipe=self.recipe)
+        Favorite.objects.create(user=self.user, recipe=other)
+        updates = self.counter_updates(
+            User.objects.filter(pk__in=[self.user.pk, readers[0].pk]).delete
+        )
+        # Избранное с разными дельтами и список покупок.
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(
+            self.counters(self.recipe, 'favorites_count', 'carts_count'),
+            (1, 1)
+        )
+        self.assertEqual(self.counters(other, 'favorites_count'), 0)
+
+    def test_recipe_cascade_delete(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(self.counter_updates(self.recipe.delete), [])
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_subscribers(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.api.post(url).status_code, 201)
+        self.assertEqual(self.counters(self.author, 'subscribers_count'), 1)
+        self.assertEqual(self.api.delete(url).status_code, 204)
+        self.assertEqual(self.counters(self.author, 'subscribers_count'), 0)
+
+    def test_recipes(self):
+        self.assertEqual(self.counters(self.author, 'recipes_count'), 1)
+        recipe = self.create_recipe(self.author, name='second')
+        self.assertEqual(self.counters(self.author, 'recipes_count'), 2)
+        recipe.delete()
+        self.assertEqual(self.counters(self.author, 'recipes_count'), 1)
+
+    def test_recount(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Follow.objects.create(user=self.user, following=self.author)
+        Recipe.objects.update(favorites_count=5, carts_count=3)
+        User.objects.update(recipes_count=7, subscribers_count=2)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(
+            self.counters(self.recipe, 'favorites_count', 'carts_count'),
+            (1, 0)
+        )
+        self.assertEqual(
+            self.counters(self.author, 'recipes_count', 'subscribers_count'),
+            (1, 1)
+        )
+        self.assertEqual(
+            self.counters(self.user, 'recipes_count', 'subscribers_count'),
+            (0, 0)
+        )
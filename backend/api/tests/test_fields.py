@@ -0,0 +1,75 @@
+from django.test import override_settings
+from rest_framework import serializers
+
+from api.tests.base import FoodgramTestCase
+from api.v1.fields import BulkPrimaryKeyRelatedField
+from api.v1.foods.serializers import IngredientFromRecipeSerializer
+from foods.models import Tag
+
+
+class BulkPrimaryKeyTest(FoodgramTestCase):
+    """Пакетная загрузка объектов по списку первичных ключей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [cls.create_tag(slug) for slug in ('a', 'b', 'c')]
+        cls.ingredients = [
+            cls.create_ingredient(name) for name in ('salt', 'sugar')
+        ]
+
+    def tags_field(self):
+        return BulkPrimaryKeyRelatedField(
+            queryset=Tag.objects.all(),
+            many=True
+        )
+
+    def ingredients_serializer(self, *pks):
+        return IngredientFromRecipeSerializer(
+            many=True,
+            data=[{'id': pk, 'amount': 1} for pk in pks]
+        )
+
+    def test_tags_one_query(self):
+        first, second, third = self.tags
+        pks = [third.pk, first.pk, third.pk, second.pk]
+        with self.assertNumQueries(1):
+            tags = self.tags_field().run_validation(pks)
+        self.assertEqual(tags, [third, first, third, second])
+
+    def test_unknown_tags(self):
+        pks = [self.tags[0].pk, 998, 999, 998]
+        with self.assertNumQueries(1):
+            with self.assertRaises(serializers.ValidationError) as context:
+                self.tags_field().run_validation(pks)
+        [error] = context.exception.detail
+        self.assertIn('"998", "999"', error)
+        self.assertEqual(error.count('998'), 1)
+
+    @override_settings(INGREDIENT_INDEX_ENABLED=False)
+    def test_ingredients_one_query(self):
+        salt, sugar = self.ingredients
+        serializer = self.ingredients_serializer(sugar.pk, salt.pk, sugar.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            [item['ingredient'] for item in serializer.validated_data],
+            [sugar, salt, sugar]
+        )
+
+    def test_ingredients_from_index(self):
+        salt, sugar = self.ingredients
+        self.ingredients_serializer(salt.pk).is_valid()
+        serializer = self.ingredients_serializer(sugar.pk, salt.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(
+            [item['ingredient'].name for item in serializer.validated_data],
+            ['sugar', 'salt']
+        )
+
+    def test_unknown_ingredients(self):
+        salt, _ = self.ingredients
+        serializer = self.ingredients_serializer(998, salt.pk, 999)
+        self.assertFalse(serializer.is_valid())
+        [error] = serializer.errors['id']
+        self.assertIn('"998", "999"', error)
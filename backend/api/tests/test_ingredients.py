@@ -0,0 +1,54 @@
+from api.tests.base import FoodgramTestCase
+from foods.models import Ingredient
+from foods.search import ingredient_index
+
+
+class IngredientIndexTest(FoodgramTestCase):
+    """Поиск ингредиентов по индексу в памяти процесса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in (
+            'Масло соленое', 'Соль', 'соус Томатный', 'Сахар', 'Pepper', 'Ёж'
+        ):
+            cls.create_ingredient(name)
+
+    def names(self, name, limit=None):
+        return [
+            item['name'] for item in ingredient_index.search(name, limit)
+        ]
+
+    def test_prefix_before_substring(self):
+        self.assertEqual(
+            self.names('со'),
+            ['Соль', 'соус Томатный', 'Масло соленое']
+        )
+
+    def test_limit(self):
+        self.assertEqual(self.names('со', 2), ['Соль', 'соус Томатный'])
+        self.assertEqual(self.names('сол', 1), ['Соль'])
+        self.assertEqual(len(self.names('', 3)), 3)
+
+    def test_casefold(self):
+        self.assertEqual(self.names('СОУС'), ['соус Томатный'])
+        self.assertEqual(self.names('томат'), ['соус Томатный'])
+        self.assertEqual(self.names('PEPP'), ['Pepper'])
+        self.assertEqual(self.names('ёж'), ['Ёж'])
+
+    def test_rebuilt_after_change(self):
+        self.assertEqual(self.names('соль'), ['Соль'])
+        with self.captureOnCommitCallbacks(execute=True):
+            salt = Ingredient.objects.create(
+                name='Соль морская',
+                measurement_unit='г'
+            )
+        self.assertEqual(self.names('соль'), ['Соль', 'Соль морская'])
+        with self.captureOnCommitCallbacks(execute=True):
+            salt.name = 'Морская соль'
+            salt.save()
+        self.assertEqual(self.names('соль'), ['Соль', 'Морская соль'])
+        with self.captureOnCommitCallbacks(execute=True):
+            salt.delete()
+        self.assertEqual(self.names('соль'), ['Соль'])
+        with self.assertNumQueries(0):
+            self.names('соль')
@@ -0,0 +1,16 @@
+import json
+
+from api.tests.base import FoodgramTestCase
+
+
+class RequestMetricsTest(FoodgramTestCase):
+    """Метрики запроса в заголовке Server-Timing и в логе."""
+
+    def test_logged_by_default(self):
+        with self.assertLogs('foodgram.metrics', 'INFO') as logs:
+            response = self.client.get('/api/tags/')
+        self.assertIn('total;dur=', response['Server-Timing'])
+        [record] = logs.records
+        line = json.loads(record.getMessage())
+        self.assertEqual(line['route'], '/api/tags/')
+        self.assertEqual(line['status'], 200)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from api.tests.base import FoodgramTestCase
+from backend.constants import PAGE_SIZE
+from foods.models import Favorite, Recipe
+
+
+class ApproximateCountTest(FoodgramTestCase):
+    """Кеш count сбрасывается при изменении списка рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        for i in range(PAGE_SIZE):
+            cls.create_recipe(cls.author, name=f'recipe{i}')
+
+    def test_new_page_after_create(self):
+        self.assertEqual(self.client.get('/api/recipes/').data['count'], 6)
+        self.assertEqual(
+            self.client.get('/api/recipes/?page=2').status_code,
+            404
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_recipe(self.author, name='new')
+        response = self.client.get('/api/recipes/?page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], PAGE_SIZE + 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_personal_filter_after_change(self):
+        user = self.create_user('reader')
+        client = self.client_for(user)
+        url = '/api/recipes/?is_favorited=1'
+        self.assertEqual(client.get(url).data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(
+                user=user,
+                recipe=self.author.recipes.first()
+            )
+        self.assertEqual(client.get(url).data['count'], 1)
+
+
+class KeysetCursorTest(FoodgramTestCase):
+    """Курсор по (created_at, id) при одинаковом времени создания."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = cls.create_user('author')
+        recipes = [
+            cls.create_recipe(author, name=f'recipe{i}') for i in range(7)
+        ]
+        now = timezone.now()
+        for index, recipe in enumerate(recipes):
+            # Три группы рецептов с общим временем создания.
+            Recipe.objects.filter(pk=recipe.pk).update(
+                created_at=now - timedelta(minutes=index % 3)
+            )
+        cls.expected = list(Recipe.objects.order_by(
+            '-created_at', '-id'
+        ).values_list('id', flat=True))
+
+    def walk(self, url, link):
+        """Адреса и id рецептов страниц по ссылкам link."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(
+                (url, [recipe['id'] for recipe in response.data['results']])
+            )
+            url = response.data[link]
+        return pages
+
+    def test_forward_and_backward(self):
+        forward = self.walk('/api/recipes/?pagination=cursor&limit=2', 'next')
+        ids = [page for _, page in forward]
+        self.assertEqual(sum(ids, []), self.expected)
+        self.assertEqual([len(page) for page in ids], [2, 2, 2, 1])
+        backward = self.walk(forward[-1][0], 'previous')
+        self.assertEqual([page for _, page in backward], ids[::-1])
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from backend.constants import PAGE_SIZE
+from foods.models import Favorite, ShoppingCart
+from users.models import Follow
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user('reader')
+        authors = [cls.create_user(f'author{i}') for i in range(3)]
+        tags = [cls.create_tag('breakfast'), cls.create_tag('dinner')]
+        ingredients = [
+            cls.create_ingredient(f'ingredient{i}') for i in range(4)
+        ]
+        for i in range(PAGE_SIZE):
+            recipe = cls.create_recipe(
+                authors[i % len(authors)],
+                tags=tags[:1 + i % 2],
+                ingredients=[
+                    (ingredients[(i + k) % len(ingredients)], 10 + k)
+                    for k in range(3)
+                ]
+            )
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            if i % 2:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, following=authors[0])
+
+    def assert_list_queries(self, client, queries, params=''):
+        for limit in (2, PAGE_SIZE):
+            with self.subTest(limit=limit):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = client.get(
+                        f'/api/recipes/?limit={limit}{params}'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous_list(self):
+        # count, страница, теги, ингредиенты, авторы.
+        self.assert_list_queries(self.client, 5)
+
+    def test_authenticated_list(self):
+        # Плюс токен и связи пользователя: избранное, покупки, подписки.
+        self.assert_list_queries(self.client_for(self.user), 9)
+
+    def test_personal_filter(self):
+        # Те же запросы, но ответ строится без общего анонимного кеша.
+        self.assert_list_queries(
+            self.client_for(self.user),
+            9,
+            '&is_favorited=1'
+        )
+
+    def test_cursor_pagination(self):
+        # Без count.
+        self.assert_list_queries(
+            self.client_for(self.user),
+            8,
+            '&pagination=cursor'
+        )
+
+    def test_flags(self):
+        client = self.client_for(self.user)
+        response = client.get(f'/api/recipes/?limit={PAGE_SIZE}')
+        results = response.data['results']
+        self.assertTrue(all(recipe['is_favorited'] for recipe in results))
+        self.assertEqual(
+            sum(recipe['is_in_shopping_cart'] for recipe in results),
+            PAGE_SIZE // 2
+        )
+        self.assertEqual(
+            {
+                recipe['author']['username'] for recipe in results
+                if recipe['author']['is_subscribed']
+            },
+            {'author0'}
+        )
+
+
+class SubscriptionQueriesTest(FoodgramTestCase):
+    """Число запросов списка подписок не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user('reader')
+        for i in range(PAGE_SIZE):
+            author = cls.create_user(f'author{i}')
+            for k in range(3):
+                cls.create_recipe(author, name=f'recipe{i}-{k}')
+            Follow.objects.create(user=cls.user, following=author)
+
+    def test_subscriptions(self):
+        client = self.client_for(self.user)
+        for limit in (2, PAGE_SIZE):
+            for recipes_limit in (1, 3):
+                with self.subTest(limit=limit, recipes_limit=recipes_limit):
+                    cache.clear()
+                    # Токен, count, авторы и их рецепты одним запросом
+                    # с ROW_NUMBER по автору.
+                    with self.assertNumQueries(4):
+                        response = client.get(
+                            f'/api/users/subscriptions/?limit={limit}'
+                            f'&recipes_limit={recipes_limit}'
+                        )
+                    self.assertEqual(response.status_code, 200)
+                    results = response.data['results']
+                    self.assertEqual(len(results), limit)
+                    self.assertEqual(
+                        {len(user['recipes']) for user in results},
+                        {recipes_limit}
+                    )
+                    self.assertTrue(all(
+                        user['is_subscribed'] and user['recipes_count'] == 3
+                        for user in results
+                    ))
@@ -0,0 +1,180 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from foods.models import ShoppingCart, ShoppingListItem
+
+
+class ShoppingListTest(FoodgramTestCase):
+    """Список покупок, который ведется по изменениям корзины и рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.user = cls.create_user('reader')
+        cls.tag = cls.create_tag('breakfast')
+        cls.salt = cls.create_ingredient('salt')
+        cls.sugar = cls.create_ingredient('sugar')
+        cls.flour = cls.create_ingredient('flour')
+        cls.soup = cls.create_recipe(
+            cls.author,
+            tags=[cls.tag],
+            ingredients=[(cls.salt, 5), (cls.sugar, 10)],
+            name='soup'
+        )
+        cls.cake = cls.create_recipe(
+            cls.author,
+            tags=[cls.tag],
+            ingredients=[(cls.sugar, 100), (cls.flour, 200)],
+            name='cake'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.api = self.client_for(self.user)
+
+    def shopping_list(self, user=None):
+        return dict(ShoppingListItem.objects.filter(
+            user=user or self.user
+        ).values_list('ingredient__name', 'total_amount'))
+
+    def add(self, recipe):
+        self.api.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+
+    def test_add_and_remove(self):
+        self.add(self.soup)
+        self.add(self.cake)
+        self.assertEqual(
+            self.shopping_list(),
+            {'salt': 5, 'sugar': 110, 'flour': 200}
+        )
+        self.api.delete(f'/api/recipes/{self.soup.pk}/shopping_cart/')
+        self.assertEqual(self.shopping_list(), {'sugar': 100, 'flour': 200})
+
+    def test_batch(self):
+        self.api.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'add': [self.soup.pk, self.cake.pk]},
+            format='json'
+        )
+        self.assertEqual(
+            self.shopping_list(),
+            {'salt': 5, 'sugar': 110, 'flour': 200}
+        )
+        self.api.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'remove': [self.cake.pk]},
+            format='json'
+        )
+        self.assertEqual(self.shopping_list(), {'salt': 5, 'sugar': 10})
+
+    def test_recipe_ingredients_changed(self):
+        self.add(self.soup)
+        response = self.client_for(self.author).patch(
+            f'/api/recipes/{self.soup.pk}/',
+            {
+                'name': 'soup',
+                'text': 'Описание',
+                'cooking_time': 10,
+                'tags': [self.tag.pk],
+                'ingredients': [
+                    {'id': self.sugar.pk, 'amount': 30},
+                    {'id': self.flour.pk, 'amount': 1},
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.shopping_list(), {'sugar': 30, 'flour': 1})
+        self.assertEqual(self.shopping_list(self.author), {})
+
+    def test_recipe_deleted(self):
+        self.add(self.soup)
+        self.add(self.cake)
+        self.cake.delete()
+        self.assertEqual(self.shopping_list(), {'salt': 5, 'sugar': 10})
+
+    def test_recipe_deleted_from_many_lists(self):
+        readers = [self.create_user(f'reader{i}') for i in range(3)]
+        for user in (self.user, *readers):
+            ShoppingCart.objects.create(user=user, recipe=self.soup)
+            ShoppingCart.objects.create(user=user, recipe=self.cake)
+        with CaptureQueriesContext(connection) as context:
+            self.cake.delete()
+        list_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'shoppinglistitem' in query['sql']
+            or 'ingredientrecipe' in query['sql']
+        ]
+        # Выборка и удаление ингредиентов рецепта, их сумма и одна правка
+        # списков всех покупателей с удалением пустых строк.
+        self.assertEqual(len(list_queries), 5)
+        for user in (self.user, *readers):
+            self.assertEqual(
+                self.shopping_list(user),
+                {'salt': 5, 'sugar': 10}
+            )
+
+    def test_author_deleted(self):
+        other = self.create_user('other')
+        self.add(self.soup)
+        ShoppingCart.objects.create(user=other, recipe=self.cake)
+        ShoppingCart.objects.create(user=self.author, recipe=self.soup)
+        self.author.delete()
+        self.assertEqual(self.shopping_list(), {})
+        self.assertEqual(self.shopping_list(other), {})
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def download(self, **headers):
+        return self.api.get('/api/recipes/download_shopping_cart/', **headers)
+
+    @staticmethod
+    def text(response):
+        if response.streaming:
+            return b''.join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def test_download(self):
+        self.add(self.soup)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add(self.cake)
+        response = self.download()
+        self.assertTrue(response.streaming)
+        text = self.text(response)
+        self.assertIn('sugar (г): 110\n', text)
+        cached = self.download()
+        self.assertFalse(cached.streaming)
+        self.assertEqual(self.text(cached), text)
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.delete(f'/api/recipes/{self.cake.pk}/shopping_cart/')
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sugar (г): 10\n', self.text(response))
+
+    def test_rebuild(self):
+        self.add(self.soup)
+        ShoppingCart.objects.bulk_create(
+            [ShoppingCart(user=self.author, recipe=self.cake)]
+        )
+        ShoppingListItem.objects.filter(ingredient=self.salt).update(
+            total_amount=1
+        )
+        ShoppingListItem.objects.create(
+            user=self.user,
+            ingredient=self.flour,
+            total_amount=3
+        )
+        expected = {'salt': 5, 'sugar': 10}
+        call_command('rebuild_shopping_lists', '--dry-run', stdout=StringIO())
+        self.assertNotEqual(self.shopping_list(), expected)
+        call_command('rebuild_shopping_lists', stdout=StringIO())
+        self.assertEqual(self.shopping_list(), expected)
+        self.assertEqual(
+            self.shopping_list(self.author),
+            {'sugar': 100, 'flour': 200}
+        )
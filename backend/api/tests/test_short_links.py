@@ -0,0 +1,66 @@
+from api.tests.base import FoodgramTestCase
+from foods.links import short_link_codec
+from foods.models import URLRecipe
+
+
+class ShortLinkTest(FoodgramTestCase):
+    """Редиректы по коротким ссылкам и сброс кеша старых ссылок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = cls.create_recipe(cls.create_user('author'))
+        cls.link = URLRecipe.objects.create(
+            recipe=cls.recipe,
+            full_url=f'/recipes/{cls.recipe.pk}',
+            short_url='legacy'
+        )
+
+    def test_generated_link(self):
+        response = self.client.get(f'/api/recipes/{self.recipe.pk}/get-link/')
+        code = response.data['short-link'].rsplit('/', 1)[-1]
+        self.assertEqual(short_link_codec.decode(code), self.recipe.pk)
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/s/{code}/')
+        self.assertRedirects(
+            response,
+            f'/recipes/{self.recipe.pk}',
+            fetch_redirect_response=False
+        )
+
+    def test_legacy_link_cached(self):
+        self.client.get('/s/legacy/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/s/legacy/')
+        self.assertEqual(response['Location'], self.link.full_url)
+
+    def test_missing_link_cached(self):
+        self.assertEqual(self.client.get('/s/nolink/').status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.client.get('/s/nolink/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalidated_after_commit(self):
+        self.client.get('/s/legacy/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.link.full_url = '/recipes/new'
+            self.link.save()
+        self.assertEqual(
+            self.client.get('/s/legacy/')['Location'],
+            '/recipes/new'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.link.delete()
+        self.assertEqual(self.client.get('/s/legacy/').status_code, 404)
+
+    def test_new_link_resolved(self):
+        self.assertEqual(self.client.get('/s/fresh/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            URLRecipe.objects.create(
+                recipe=self.recipe,
+                full_url='/recipes/fresh',
+                short_url='fresh'
+            )
+        self.assertEqual(
+            self.client.get('/s/fresh/')['Location'],
+            '/recipes/fresh'
+        )
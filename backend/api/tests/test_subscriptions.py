@@ -0,0 +1,22 @@
+from api.tests.base import FoodgramTestCase
+
+
+class SubscribeTest(FoodgramTestCase):
+    """Подписка на автора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.user = cls.create_user('reader')
+        cls.create_recipe(cls.author)
+
+    def test_subscribe_after_cached_relations(self):
+        api = self.client_for(self.user)
+        recipes = api.get('/api/recipes/').json()['results']
+        self.assertFalse(recipes[0]['author']['is_subscribed'])
+        response = api.post(f'/api/users/{self.author.pk}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['is_subscribed'])
+        results = api.get('/api/users/subscriptions/').json()['results']
+        self.assertEqual([user['id'] for user in results], [self.author.pk])
+        self.assertTrue(results[0]['is_subscribed'])
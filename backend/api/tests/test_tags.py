@@ -0,0 +1,58 @@
+from django.db import transaction
+
+from api.tests.base import FoodgramTestCase
+
+
+class TagCacheTest(FoodgramTestCase):
+    """Кеш тегов и его сброс при изменении таблицы тегов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = cls.create_tag('breakfast')
+
+    def test_not_modified(self):
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/tags/',
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_list(self):
+        self.client.get('/api/tags/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(len(response.json()), 1)
+
+    def test_invalidated_after_commit(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_tag('dinner')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [tag['slug'] for tag in response.json()],
+            ['breakfast', 'dinner']
+        )
+
+    def test_detail_invalidated(self):
+        url = f'/api/tags/{self.tag.pk}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_rollback_keeps_version(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.create_tag('dinner')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
@@ -1,5 +1,8 @@
 from django.urls import include, path
 
+from backend.metrics import metrics_view
+
 urlpatterns = [
+    path('_metrics', metrics_view),
     path('', include('api.v1.urls')),
 ]
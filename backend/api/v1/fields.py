@@ -1,13 +1,152 @@
-import base64
+import binascii
+import os
+import re
+import tempfile
+import weakref
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db.models.fields.files import FieldFile
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from backend.constants import BASE64_CHUNK_SIZE
+
+# Символы вне алфавита base64 (переносы строк, пробелы), которые
+# a2b_base64 пропускает.
+NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Base64TemporaryFile(File):
+    """Временный файл на диске с декодированным изображением.
+
+    Хранилище перемещает его на место без копирования. Если файл так и не
+    был сохранен, он удаляется вместе с объектом.
+    """
+
+    def __init__(self, name):
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + os.path.splitext(name)[1],
+            dir=settings.FILE_UPLOAD_TEMP_DIR,
+            delete=False
+        )
+        super().__init__(file, name)
+        weakref.finalize(self, remove_file, file.name)
+
+    def temporary_file_path(self):
+        return self.file.name
 
 
 class Base64ImageField(serializers.ImageField):
+    """Поле изображения в base64.
+
+    Данные декодируются частями сразу во временный файл, без второй полной
+    копии изображения в памяти. variant задает размер изображения, который
+    отдается при чтении, если он уже сгенерирован.
+    """
+
+    def __init__(self, *args, variant=None, **kwargs):
+        self.variant = variant
+        super().__init__(*args, **kwargs)
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(imgstr, 'temp.' + ext)
         return super().to_internal_value(data)
+
+    def decode(self, imgstr, name):
+        file = Base64TemporaryFile(name)
+        rest = ''
+        try:
+            for start in range(0, len(imgstr), BASE64_CHUNK_SIZE):
+                chunk = rest + NON_BASE64.sub(
+                    '', imgstr[start:start + BASE64_CHUNK_SIZE]
+                )
+                # Декодируется только целое число групп по 4 символа,
+                # остаток переносится в следующую часть.
+                size = len(chunk) - len(chunk) % 4
+                file.write(binascii.a2b_base64(chunk[:size]))
+                rest = chunk[size:]
+            file.write(binascii.a2b_base64(rest))
+        except binascii.Error:
+            self.fail('invalid_image')
+        file.flush()
+        file.seek(0)
+        return file
+
+    def to_representation(self, value, variant=None):
+        variant = variant or self.context.get('image_variant', self.variant)
+        instance = getattr(value, 'instance', None)
+        variants = getattr(instance, 'image_variants', None) or {}
+        if variant in variants and variants.get('source') == value.name:
+            value = FieldFile(instance, value.field, variants[variant])
+        return super().to_representation(value)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле первичного ключа, объекты которого загружаются пачкой.
+
+    Поле само проверяет только формат id. Объекты всех переданных id
+    загружаются одним запросом в BulkManyRelatedField для many=True или
+    в BulkListSerializer для вложенных сериализаторов. lookup - функция,
+    отдающая объекты по id без запроса к базе, недостающие берутся
+    из queryset. Неизвестные id попадают в одну ошибку.
+    """
+
+    default_error_messages = {
+        'does_not_exist_bulk': (
+            'Недопустимые первичные ключи {pk_values} - объекты не '
+            'существуют.'
+        ),
+    }
+
+    def __init__(self, lookup=None, **kwargs):
+        self.lookup = lookup
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def resolve(self, pks):
+        """Объекты в порядке pks."""
+        objects = self.lookup(pks) if self.lookup else {}
+        missing = set(pks) - objects.keys()
+        if missing:
+            objects.update(self.get_queryset().in_bulk(missing))
+        unknown = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if unknown:
+            self.fail(
+                'does_not_exist_bulk',
+                pk_values=', '.join(f'"{pk}"' for pk in unknown)
+            )
+        return [objects[pk] for pk in pks]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список id, все объекты которого загружаются одним запросом."""
+
+    def to_internal_value(self, data):
+        return self.child_relation.resolve(super().to_internal_value(data))
@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .serializers import TagSerializer
+from .utils import search_limit
+from .views import IngredientViewSet, TagViewSet
+from backend.constants import RESPONSE_CACHE_TIMEOUT
+from foods.cache import TAGS_VERSION_KEY, get_version
+from foods.links import short_link_codec, short_links
+from foods.models import Tag
+from foods.search import ingredient_index
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Кеш не использует соединение с базой, поэтому ему не нужен общий
+# для запроса поток.
+cache_get = sync_to_async(cache.get, thread_sensitive=False)
+cache_set = sync_to_async(cache.set, thread_sensitive=False)
+get_version_async = sync_to_async(get_version, thread_sensitive=False)
+ingredient_list_fallback = sync_to_async(
+    IngredientViewSet.as_view({'get': 'list'})
+)
+
+
+def json_response(data, **kwargs):
+    return JsonResponse(
+        data,
+        safe=False,
+        json_dumps_params={'ensure_ascii': False},
+        **kwargs
+    )
+
+
+async def redirect_view(request, short_link):
+    """View функция для редиректа по короткой ссылке."""
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    pk = short_link_codec.decode(short_link)
+    if pk is not None:
+        return redirect(f'/recipes/{pk}')
+    full_url = await sync_to_async(short_links.resolve)(short_link)
+    if full_url is None:
+        raise Http404
+    return redirect(full_url)
+
+
+async def ingredient_list(request):
+    """Автодополнение ингредиентов по индексу в памяти процесса."""
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    if not settings.INGREDIENT_INDEX_ENABLED:
+        return await ingredient_list_fallback(request)
+    return json_response(await sync_to_async(ingredient_index.search)(
+        request.GET.get('name', ''),
+        search_limit(request.GET)
+    ))
+
+
+def load_tags():
+    return TagSerializer(Tag.objects.all(), many=True).data
+
+
+async def tag_list(request):
+    """Список тегов из кеша по версии каталога.
+
+    Ключ и ETag совпадают с TagViewSet, поэтому кеш у них общий.
+    """
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    version = await get_version_async(TAGS_VERSION_KEY)
+    key = TagViewSet.make_cache_key('tags', 'list', '', 'json', version)
+    etag = f'"{key}"'
+    last_modified = version // 10 ** 9
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is None:
+        data = await cache_get(key)
+        if data is None:
+            data = await sync_to_async(load_tags)()
+            await cache_set(key, data, RESPONSE_CACHE_TIMEOUT)
+        response = json_response(data)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -1,6 +1,24 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters_dj
 
-from foods.models import Recipe
+from foods.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    TagRecipe
+)
+
+
+class IngredientFilter(filters_dj.FilterSet):
+    name = filters_dj.CharFilter(method='filter_by_name')
+
+    def filter_by_name(self, queryset, name, value):
+        return queryset.search(value)
+
+    class Meta:
+        model = Ingredient
+        fields = ['name']
 
 
 class RecipeFilter(filters_dj.FilterSet):
@@ -13,18 +31,27 @@ class RecipeFilter(filters_dj.FilterSet):
 
     def filter_by_tags(self, queryset, name, value):
         tags = self.request.query_params.getlist(name)
-        return queryset.filter(tags__slug__in=tags).distinct()
+        return queryset.filter(Exists(TagRecipe.objects.filter(
+            recipe=OuterRef('pk'),
+            tag__slug__in=tags
+        )))
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if user.is_authenticated and value:
-            return queryset.filter(favorites__user=user)
+            return queryset.filter(Exists(Favorite.objects.filter(
+                recipe=OuterRef('pk'),
+                user=user
+            )))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if user.is_authenticated and value:
-            return queryset.filter(shopping_carts__user=user)
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                recipe=OuterRef('pk'),
+                user=user
+            )))
         return queryset
 
     class Meta:
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
-from .utils import add_ingredients
-from api.v1.fields import Base64ImageField
+from .utils import add_ingredients, update_ingredients
+from api.v1.fields import Base64ImageField, BulkPrimaryKeyRelatedField
+from api.v1.mixins import MeasuredRepresentationMixin
 from api.v1.users.serializers import UserReadSerializer
-from api.v1.serializers import RecipeShortReadSerializer
+from api.v1.serializers import BulkListSerializer, RecipeShortReadSerializer
 from api.v1.utils import check_field
+from backend.constants import IMAGE_VARIANTS, RECIPE_BATCH_MAX_SIZE
 from foods.models import (
     Favorite,
     Ingredient,
@@ -14,12 +17,15 @@ from foods.models import (
     ShoppingCart,
     Tag
 )
+from foods.search import ingredients_in_bulk
 
 
 User = get_user_model()
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(
+    MeasuredRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор тегов для рецепта."""
 
     class Meta:
@@ -27,7 +33,9 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    MeasuredRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор ингредиентов для рецепта."""
 
     class Meta:
@@ -38,9 +46,10 @@ class IngredientSerializer(serializers.ModelSerializer):
 class IngredientFromRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для ингредиентов в составе рецепта"""
 
-    id = serializers.PrimaryKeyRelatedField(
+    id = BulkPrimaryKeyRelatedField(
         source='ingredient',
-        queryset=Ingredient.objects.all()
+        queryset=Ingredient.objects.all(),
+        lookup=ingredients_in_bulk
     )
     name = serializers.CharField(source='ingredient.name', read_only=True)
     measurement_unit = serializers.CharField(
@@ -52,6 +61,7 @@ class IngredientFromRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = IngredientRecipe
         fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = BulkListSerializer
 
     def validate_amount(self, value):
         if value < 1:
@@ -76,7 +86,9 @@ class IngredientFromRecipeSerializer(serializers.ModelSerializer):
         return data
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(
+    MeasuredRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор рецептов."""
 
     author = UserReadSerializer(read_only=True)
@@ -86,7 +98,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         source='ingredientrecipe_set',
         allow_empty=False
     )
-    image = Base64ImageField()
+    image = Base64ImageField(variant='full')
+    images = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -101,15 +114,33 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
             'text',
             'cooking_time',
         )
 
+    def get_images(self, obj):
+        field = self.fields['image']
+        return {
+            variant: field.to_representation(obj.image, variant)
+            for variant in IMAGE_VARIANTS
+        }
+
     def get_is_favorited(self, obj):
+        relations = self.context.get('relations')
+        if relations is not None:
+            return obj.id in relations['favorites']
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         obj = obj.favorites.all()
         return check_field(self, obj)
 
     def get_is_in_shopping_cart(self, obj):
+        relations = self.context.get('relations')
+        if relations is not None:
+            return obj.id in relations['carts']
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         obj = obj.shopping_carts.all()
         return check_field(self, obj)
 
@@ -117,7 +148,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 class RecipeWriteSerializer(RecipeReadSerializer):
     """Сериализатор рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
         write_only=True,
@@ -181,10 +212,14 @@ class RecipeWriteSerializer(RecipeReadSerializer):
         return data
 
     def to_representation(self, instance):
+        instance = Recipe.objects.for_user(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeReadSerializer(
             data=instance, context=self.context
         ).to_representation(instance)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredientrecipe_set')
         tags = validated_data.pop('tags')
@@ -193,12 +228,12 @@ class RecipeWriteSerializer(RecipeReadSerializer):
         add_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredientrecipe_set', None)
         tags = validated_data.pop('tags', None)
         instance.tags.set(tags)
-        instance.ingredientrecipe_set.all().delete()
-        add_ingredients(instance, ingredients)
+        update_ingredients(instance, ingredients)
         return super().update(instance, validated_data)
 
 
@@ -229,3 +264,31 @@ class FavoreteSerializer(FavoriteAndShoppingCartSerializer):
 class ShoppingCartSerializer(FavoriteAndShoppingCartSerializer):
     class Meta(FavoriteAndShoppingCartSerializer.Meta):
         model = ShoppingCart
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    """Сериализатор пакетного добавления и удаления рецептов."""
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=RECIPE_BATCH_MAX_SIZE,
+        default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=RECIPE_BATCH_MAX_SIZE,
+        default=list
+    )
+
+    def validate(self, data):
+        add = list(dict.fromkeys(data['add']))
+        remove = list(dict.fromkeys(data['remove']))
+        if not add and not remove:
+            raise serializers.ValidationError(
+                'Нужно передать рецепты в add или remove.'
+            )
+        if set(add) & set(remove):
+            raise serializers.ValidationError(
+                'Рецепт не может быть одновременно в add и remove.'
+            )
+        return {'add': add, 'remove': remove}
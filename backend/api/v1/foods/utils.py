@@ -1,21 +1,140 @@
+import csv
+import json
+
+from django.core.cache import cache
+
+from backend.constants import (
+    INGREDIENT_SEARCH_MAX_LIMIT,
+    RESPONSE_CACHE_TIMEOUT,
+    SHOPPING_CART_CACHE_MAX_SIZE
+)
 from foods.models import IngredientRecipe
+from foods.shopping_lists import recipe_amounts_changed
+
+
+def search_limit(params):
+    """Ограничение выдачи поиска ингредиентов из параметра limit."""
+    try:
+        limit = int(params['limit'])
+    except (KeyError, ValueError):
+        return None
+    return max(0, min(limit, INGREDIENT_SEARCH_MAX_LIMIT))
 
 
 def add_ingredients(recipe, ingredients):
     """Добавление ингредиентов в рецепт."""
-    for ingredient in ingredients:
-        ingredient_obj = ingredient.pop('ingredient')
-        amount = ingredient.pop('amount')
-        IngredientRecipe.objects.create(
-            amount=amount,
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            amount=ingredient['amount'],
             recipe=recipe,
-            ingredient=ingredient_obj
+            ingredient=ingredient['ingredient']
         )
+        for ingredient in ingredients
+    )
+
 
+def update_ingredients(recipe, ingredients):
+    """Обновление ингредиентов рецепта только по изменившимся строкам."""
+    current = {
+        ingredient.ingredient_id: ingredient
+        for ingredient in recipe.ingredientrecipe_set.all()
+    }
+    new = {
+        ingredient['ingredient'].id: ingredient for ingredient in ingredients
+    }
+    old_amounts = {
+        ingredient_id: ingredient.amount
+        for ingredient_id, ingredient in current.items()
+    }
+    changed = []
+    for ingredient_id, ingredient in current.items():
+        amount = new.get(ingredient_id, {}).get('amount')
+        if amount is not None and amount != ingredient.amount:
+            ingredient.amount = amount
+            changed.append(ingredient)
+    removed = current.keys() - new.keys()
+    if removed:
+        IngredientRecipe.objects.filter(
+            recipe=recipe,
+            ingredient_id__in=removed
+        ).delete()
+    if changed:
+        IngredientRecipe.objects.bulk_update(changed, ['amount'])
+    add_ingredients(
+        recipe,
+        [new[ingredient_id] for ingredient_id in new.keys() - current.keys()]
+    )
+    recipe_amounts_changed(
+        recipe.pk,
+        old_amounts,
+        {
+            ingredient_id: ingredient['amount']
+            for ingredient_id, ingredient in new.items()
+        }
+    )
 
-def shopping_cart(ingredients):
-    """Формирование файла списка покупок."""
-    shopping = 'Список покупок:\n'
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def shopping_cart_txt(ingredients):
+    """Формирование текстового списка покупок."""
+    yield 'Список покупок:\n'
     for ingredient, measurement_unit, amount in ingredients:
-        shopping += f'{ingredient} ({measurement_unit}): {amount}\n'
-    return shopping
+        yield f'{ingredient} ({measurement_unit}): {amount}\n'
+
+
+def shopping_cart_csv(ingredients):
+    """Формирование списка покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Единицы измерения', 'Количество'))
+    for row in ingredients:
+        yield writer.writerow(row)
+
+
+def shopping_cart_json(ingredients):
+    """Формирование списка покупок в формате JSON."""
+    separator = ''
+    yield '['
+    for ingredient, measurement_unit, amount in ingredients:
+        yield separator + json.dumps(
+            {
+                'name': ingredient,
+                'measurement_unit': measurement_unit,
+                'amount': amount
+            },
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']'
+
+
+def cache_chunks(chunks, key):
+    """Отдача частей ответа с сохранением его в кеш по ключу key.
+
+    В кеш попадает только полностью отданный ответ не длиннее
+    SHOPPING_CART_CACHE_MAX_SIZE символов.
+    """
+    cached, size = [], 0
+    for chunk in chunks:
+        yield chunk
+        if cached is None:
+            continue
+        size += len(chunk)
+        if size > SHOPPING_CART_CACHE_MAX_SIZE:
+            cached = None
+        else:
+            cached.append(chunk)
+    if cached is not None:
+        cache.set(key, ''.join(cached), RESPONSE_CACHE_TIMEOUT)
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': (shopping_cart_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_cart_csv, 'text/csv; charset=utf-8'),
+    'json': (shopping_cart_json, 'application/json'),
+}
@@ -1,48 +1,77 @@
 import hashlib
 
-from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action, api_view
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from .base_views import ListRetrieveViewSet
-from .filters import RecipeFilter
+from .filters import IngredientFilter, RecipeFilter
 from .serializers import (
     FavoreteSerializer,
     IngredientSerializer,
+    RecipeBatchSerializer,
     RecipeReadSerializer,
     RecipeWriteSerializer,
     ShoppingCartSerializer,
     TagSerializer
 )
-from .utils import shopping_cart
-from api.v1.mixins import CustomUpdateModelMixin
+from .utils import SHOPPING_CART_FORMATS, cache_chunks, search_limit
+from api.v1.mixins import (
+    AnonymousCacheMixin,
+    CustomUpdateModelMixin,
+    VersionedCacheMixin
+)
+from api.v1.paginators import (
+    ApproximateCountPagination,
+    RankingCursorPagination,
+    RecipeCursorPagination
+)
 from api.v1.permissions import IsAuthorOrReadOnly
-from backend.constants import SHORT_URL_LENGTH
+from backend.constants import SHOPPING_CART_FILENAME
 from backend.settings import ROOT_HOST
+from foods.cache import (
+    INGREDIENTS_VERSION_KEY,
+    RECIPES_LIST_VERSION_KEY,
+    TAGS_VERSION_KEY,
+    author_version_key,
+    cart_version_key,
+    get_versions,
+    recipe_version_key,
+    relations_version_key
+)
 from foods.models import (
     Favorite,
     Ingredient,
     Recipe,
     ShoppingCart,
-    Tag,
-    URLRecipe
+    ShoppingListItem,
+    Tag
 )
+from foods.links import short_link_codec, short_links
+from foods.relations import lock_user_relations, update_user_relations
+from foods.search import ingredient_index
 
 
-User = get_user_model()
-
-
-class TagViewSet(ListRetrieveViewSet):
+class TagViewSet(VersionedCacheMixin, ListRetrieveViewSet):
     """Представление тегов."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_version_key = TAGS_VERSION_KEY
 
 
 class IngredientViewSet(ListRetrieveViewSet):
@@ -50,11 +79,30 @@ class IngredientViewSet(ListRetrieveViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('^name',)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = IngredientFilter
+
+    def get_limit(self):
+        return search_limit(self.request.query_params)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        limit = self.get_limit() if self.action == 'list' else None
+        if limit is None:
+            return queryset
+        return queryset[:limit]
+
+    def list(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_INDEX_ENABLED:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''),
+            self.get_limit()
+        ))
 
 
 class RecipeViewSet(
+    AnonymousCacheMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -69,6 +117,80 @@ class RecipeViewSet(
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = ApproximateCountPagination
+    ranking_orderings = {
+        'popular': 'ranking__popular_rank',
+        'trending': 'ranking__trending_rank',
+    }
+
+    def get_payload_recipes(self, data):
+        return data['results'] if self.action == 'list' else [data]
+
+    def get_cache_tags(self, data):
+        tags = {TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY}
+        if self.action == 'list':
+            tags.add(RECIPES_LIST_VERSION_KEY)
+        for recipe in self.get_payload_recipes(data):
+            tags.add(recipe_version_key(recipe['id']))
+            tags.add(author_version_key(recipe['author']['id']))
+        return tags
+
+    def personalize(self, data, relations):
+        for recipe in self.get_payload_recipes(data):
+            recipe['is_favorited'] = recipe['id'] in relations['favorites']
+            recipe['is_in_shopping_cart'] = recipe['id'] in relations['carts']
+            recipe['author']['is_subscribed'] = (
+                recipe['author']['id'] in relations['follows']
+            )
+
+    def is_shared_request(self, request):
+        params = request.query_params
+        return 'is_favorited' not in params and (
+            'is_in_shopping_cart' not in params
+        )
+
+    def get_count_version_keys(self):
+        keys = [RECIPES_LIST_VERSION_KEY]
+        user = self.request.user
+        if user.is_authenticated and not self.is_shared_request(self.request):
+            keys.append(relations_version_key(user.pk))
+        return keys
+
+    def get_ranking_field(self):
+        if self.action != 'list':
+            return None
+        return self.ranking_orderings.get(
+            self.request.query_params.get('ordering')
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset().for_user()
+        ranking_field = self.get_ranking_field()
+        if ranking_field:
+            queryset = queryset.filter(
+                ranking__isnull=False
+            ).annotate(rank=F(ranking_field))
+        return queryset
+
+    @property
+    def paginator(self):
+        """Курсорная пагинация по запросу ?pagination=cursor.
+
+        Сортировки ?ordering=popular|trending всегда отдаются курсором
+        по позиции в рейтинге.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.get_ranking_field():
+                self._paginator = RankingCursorPagination()
+            elif (
+                params.get('pagination') == 'cursor'
+                or RecipeCursorPagination.cursor_query_param in params
+            ):
+                self._paginator = RecipeCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
 
     def get_permissions(self):
         if self.action == "create":
@@ -80,24 +202,48 @@ class RecipeViewSet(
             return RecipeWriteSerializer
         return super().get_serializer_class()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['image_variant'] = 'card'
+        return context
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_content_negotiation(self, request, force=False):
+        if self.action == 'download_shopping_cart':
+            # Параметр format задает формат файла, а не рендерер DRF.
+            force = True
+        return super().perform_content_negotiation(request, force)
+
+    @transaction.atomic
     def actions_add(self, pk, serilizer, model):
         recipe = get_object_or_404(Recipe, pk=pk)
+        lock_user_relations(self.request.user)
         serializer = serilizer(
             data={'user': self.request.user.id, 'recipe': pk},
             context=self.get_serializer_context(),
         )
         serializer.is_valid(raise_exception=True)
-        model.objects.create(
-            recipe=recipe,
-            user=self.request.user
-        )
+        try:
+            with transaction.atomic():
+                model.objects.create(
+                    recipe=recipe,
+                    user=self.request.user
+                )
+        except IntegrityError:
+            # Параллельный запрос успел добавить рецепт после проверки.
+            return Response(
+                {'errors': 'Рецепт уже добален.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def actions_delete(self, pk, model):
         recipe = get_object_or_404(Recipe, pk=pk)
+        lock_user_relations(self.request.user)
         count_object, _ = model.objects.filter(
             recipe=recipe,
             user=self.request.user
@@ -109,6 +255,15 @@ class RecipeViewSet(
             )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def actions_batch(self, model):
+        serializer = RecipeBatchSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(update_user_relations(
+            model,
+            self.request.user,
+            **serializer.validated_data
+        ))
+
     @action(
         detail=True,
         methods=['POST'],
@@ -124,6 +279,16 @@ class RecipeViewSet(
         """Удаление рецепта из избраного."""
         return self.actions_delete(pk, Favorite)
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite/batch'
+    )
+    def favorite_batch(self, request):
+        """Пакетное добавление и удаление рецептов в избранном."""
+        return self.actions_batch(Favorite)
+
     @action(
         detail=False,
         permission_classes=(IsAuthenticated,),
@@ -131,17 +296,56 @@ class RecipeViewSet(
     )
     def download_shopping_cart(self, request):
         """Скачивание карты покупок с необходимыми ингредиентами."""
-        ingredients = User.objects.filter(
-            username=request.user
-        ).values_list(
-            'shopping_carts__recipe__ingredients__name',
-            'shopping_carts__recipe__ingredients__measurement_unit'
-        ).annotate(
-            amount=Sum('shopping_carts__recipe__ingredientrecipe__amount')
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in SHOPPING_CART_FORMATS:
+            return Response(
+                {
+                    'errors': 'Доступные форматы: {}.'.format(
+                        ', '.join(SHOPPING_CART_FORMATS)
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        render, content_type = SHOPPING_CART_FORMATS[file_format]
+        versions = get_versions(
+            [cart_version_key(request.user.pk), INGREDIENTS_VERSION_KEY]
+        )
+        key = 'shopping_cart:{}:{}:{}'.format(
+            request.user.pk,
+            file_format,
+            ':'.join(str(version) for _, version in sorted(versions.items()))
+        )
+        etag = '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content = cache.get(key)
+            if content is not None:
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                rows = ShoppingListItem.objects.filter(
+                    user=request.user
+                ).values_list(
+                    'ingredient__name',
+                    'ingredient__measurement_unit',
+                    'total_amount'
+                ).order_by('ingredient__name')
+                # Под ASGI потоковый ответ перебирается в цикле событий,
+                # где запросы к базе запрещены, поэтому строки читаются
+                # заранее.
+                if isinstance(request._request, ASGIRequest):
+                    rows = list(rows)
+                else:
+                    rows = rows.iterator()
+                response = StreamingHttpResponse(
+                    cache_chunks(render(rows), key),
+                    content_type=content_type
+                )
+        response['ETag'] = etag
+        patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Authorization',))
+        response['Content-Disposition'] = (
+            f'attachment; filename="{SHOPPING_CART_FILENAME}.{file_format}"'
         )
-        shopping = shopping_cart(ingredients)
-        response = HttpResponse(shopping, content_type='text/plain')
-        response['Content-Disposition'] = 'attachment; filename="shopping.txt"'
         return response
 
     @action(
@@ -159,6 +363,16 @@ class RecipeViewSet(
         """Удаление рецепта из карты покупок."""
         return self.actions_delete(pk, ShoppingCart)
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart/batch'
+    )
+    def shopping_cart_batch(self, request):
+        """Пакетное добавление и удаление рецептов в карте покупок."""
+        return self.actions_batch(ShoppingCart)
+
     @action(
         detail=True,
         permission_classes=(AllowAny,),
@@ -166,22 +380,18 @@ class RecipeViewSet(
     )
     def get_link(self, request, pk=None):
         """Генерация короткой ссылки."""
-        recipe = get_object_or_404(Recipe, pk=pk)
-        short_url = hashlib.md5(
-            str(recipe.id).encode()
-        ).hexdigest()[:SHORT_URL_LENGTH]
-        url, _ = URLRecipe.objects.get_or_create(
-            recipe=recipe,
-            defaults={
-                'full_url': f'/recipes/{pk}',
-                'short_url': short_url
-            }
-        )
-        return Response({'short-link': f'{ROOT_HOST}/s/{url.short_url}'})
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        short_url = short_link_codec.encode(recipe.id)
+        return Response({'short-link': f'{ROOT_HOST}/s/{short_url}'})
 
 
 @api_view()
 def redirect_view(request, short_link):
     """View функция для редиректа по короткой ссылке."""
-    urls_recipe = get_object_or_404(URLRecipe, short_url=short_link)
-    return redirect(urls_recipe.full_url)
+    pk = short_link_codec.decode(short_link)
+    if pk is not None:
+        return redirect(f'/recipes/{pk}')
+    full_url = short_links.resolve(short_link)
+    if full_url is None:
+        raise Http404
+    return redirect(full_url)
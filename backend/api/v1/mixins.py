@@ -1,7 +1,24 @@
-from rest_framework import serializers
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from rest_framework import serializers, status
 from rest_framework.exceptions import MethodNotAllowed
 from rest_framework.response import Response
 
+from backend.constants import ANONYMOUS_CACHE_MAX_AGE, RESPONSE_CACHE_TIMEOUT
+from backend.metrics import serializer_phase
+from foods.cache import get_version, get_versions
+from foods.relations import get_user_relations
+
 
 class UserameNotMeMixin:
     def validate_username(self, value):
@@ -12,6 +29,14 @@ class UserameNotMeMixin:
         return value
 
 
+class MeasuredRepresentationMixin:
+    """Учет времени сериализации в метриках запроса."""
+
+    def to_representation(self, instance):
+        with serializer_phase():
+            return super().to_representation(instance)
+
+
 class CustomUpdateModelMixin:
     """Миксин для обновления данных без PUT метода."""
 
@@ -36,3 +61,205 @@ class CustomUpdateModelMixin:
     def partial_update(self, request, *args, **kwargs):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
+
+
+class VersionedCacheMixin:
+    """Миксин кеширования list/retrieve по версии данных.
+
+    Версия берется из кеша по ключу cache_version_key и меняется
+    сигналами при изменении модели. По ней же строятся ETag
+    и Last-Modified для ответов 304 Not Modified.
+    """
+
+    cache_version_key = None
+
+    @staticmethod
+    def make_cache_key(basename, action, lookup, format, version):
+        """Ключ кеша и ETag ответа, общий с асинхронными view."""
+        return ':'.join(map(str, (basename, action, lookup, format, version)))
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = get_version(self.cache_version_key)
+        key = self.make_cache_key(
+            self.basename,
+            self.action,
+            kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''),
+            request.accepted_renderer.format,
+            version
+        )
+        etag = f'"{key}"'
+        last_modified = version // 10 ** 9
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                data = response.data
+                cache.set(key, data, RESPONSE_CACHE_TIMEOUT)
+            response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+        )
+
+
+class UserRelationsMixin:
+    """Миксин, добавляющий в контекст сериализатора связи пользователя.
+
+    relations - id избранных рецептов, рецептов в списке покупок и авторов
+    в подписках, загружаются один раз за запрос и только при обращении.
+    """
+
+    shared_payload = False
+
+    def get_relations(self):
+        if not hasattr(self, '_relations'):
+            self._relations = get_user_relations(self.request.user)
+        return self._relations
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.user.is_authenticated and not self.shared_payload:
+            context['relations'] = SimpleLazyObject(self.get_relations)
+        return context
+
+
+class AnonymousCacheMixin(UserRelationsMixin):
+    """Миксин кеширования list/retrieve по общему анонимному ответу.
+
+    Ключ строится по пути и отсортированной строке запроса. Запись
+    хранит версии ключей из get_cache_tags и считается устаревшей, если
+    хотя бы одна из них поменялась. Авторизованным пользователям отдается
+    тот же ответ, дополненный в personalize их связями, кроме запросов,
+    для которых is_shared_request ложно. Анонимные ответы помечаются
+    Cache-Control, ETag и Vary: Authorization, чтобы их мог кешировать
+    и nginx. Без тегов запись живет RESPONSE_CACHE_TIMEOUT секунд.
+    """
+
+    cache_tags = ()
+
+    def get_cache_tags(self, data):
+        """Ключи версий, от которых зависит ответ."""
+        return self.cache_tags
+
+    def personalize(self, data, relations):
+        """Проставление флагов пользователя в общий ответ."""
+
+    def is_shared_request(self, request):
+        return True
+
+    def get_anonymous_cache_key(self, request):
+        query = urlencode(sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        ))
+        return 'anonymous:' + hashlib.md5(
+            f'{request.path}?{query}:{request.accepted_renderer.format}'
+            .encode()
+        ).hexdigest()
+
+    def get_shared_entry(self, handler, request, *args, **kwargs):
+        """Запись кеша с общим ответом или ответ с ошибкой."""
+        key = self.get_anonymous_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and get_versions(
+            list(entry['tags'])
+        ) != entry['tags']:
+            entry = None
+        if entry is None:
+            started = time.time_ns()
+            self.shared_payload = True
+            try:
+                response = handler(request, *args, **kwargs)
+            finally:
+                self.shared_payload = False
+            if response.status_code != status.HTTP_200_OK:
+                return None, response
+            entry = {
+                'tags': get_versions(
+                    list(self.get_cache_tags(response.data)),
+                    initial=started - 1
+                ),
+                'data': response.data
+            }
+            # Версия, смененная во время запроса, значит, что данные
+            # могли быть прочитаны до изменения.
+            if max(entry['tags'].values(), default=0) < started:
+                cache.set(key, entry, RESPONSE_CACHE_TIMEOUT)
+        entry['etag'] = hashlib.md5(
+            f'{key}:{sorted(entry["tags"].items())}'.encode()
+        ).hexdigest()
+        return entry, None
+
+    def anonymous_cached_response(self, handler, request, *args, **kwargs):
+        user = request.user
+        if user.is_authenticated and not self.is_shared_request(request):
+            response = handler(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        entry, response = self.get_shared_entry(
+            handler,
+            request,
+            *args,
+            **kwargs
+        )
+        if response is not None:
+            return response
+        etag = entry['etag']
+        if user.is_authenticated:
+            relations = self.get_relations()
+            etag = hashlib.md5(
+                f'{etag}:{user.pk}:{relations["version"]}'.encode()
+            ).hexdigest()
+        etag = f'"{etag}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = entry['data']
+            if user.is_authenticated:
+                self.personalize(data, relations)
+            response = Response(data)
+        response['ETag'] = etag
+        if user.is_authenticated:
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=ANONYMOUS_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_cached_response(
+            super().list,
+            request,
+            *args,
+            **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.anonymous_cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+        )
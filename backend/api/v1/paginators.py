@@ -1,6 +1,76 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
 
-from backend.constants import PAGE_SIZE
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering
+)
+
+from backend.constants import (
+    COUNT_CACHE_TIMEOUT,
+    COUNT_ESTIMATE_THRESHOLD,
+    PAGE_SIZE
+)
+from foods.cache import get_versions
+
+
+class ApproximateCountPaginator(Paginator):
+    """Пагинатор с дешевым подсчетом количества объектов.
+
+    Количество кешируется по тексту запроса и version на
+    COUNT_CACHE_TIMEOUT секунд. На PostgreSQL, если оценка планировщика больше
+    COUNT_ESTIMATE_THRESHOLD, вместо COUNT(*) отдается оценка.
+    """
+
+    def __init__(self, *args, version='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = version
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        sql, params = queryset.query.sql_with_params()
+        key = 'count:' + hashlib.md5(
+            f'{queryset.db}:{sql}:{params}:{self.version}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.estimate_count()
+            if count is None or count <= COUNT_ESTIMATE_THRESHOLD:
+                count = super().count
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def page(self, number):
+        """Страница без обрезки по count, который может быть оценкой."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page],
+            number,
+            self
+        )
+
+    def estimate_count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
 
 
 class CustomPagination(PageNumberPagination):
@@ -9,3 +79,147 @@ class CustomPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
     max_page_size = page_size
+
+
+class ApproximateCountPagination(CustomPagination):
+    """Пагинация с кешированным или оценочным count.
+
+    Кеш count сбрасывается сменой версий ключей, которые отдает метод
+    view get_count_version_keys.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        get_keys = getattr(view, 'get_count_version_keys', None)
+        # Отсутствующая версия считается старой, чтобы не выглядеть
+        # изменением, случившимся во время запроса.
+        versions = get_versions(get_keys(), initial=1) if get_keys else {}
+        self.count_version = ':'.join(
+            str(version) for _, version in sorted(versions.items())
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return ApproximateCountPaginator(
+            object_list,
+            per_page,
+            version=self.count_version
+        )
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Курсорная пагинация по ключу из всех полей сортировки.
+
+    Курсор хранит значения каждого поля ordering последнего объекта
+    страницы, следующая страница выбирается условием
+    (f1, f2, ...) < (v1, v2, ...) без смещения. Поэтому сортировка
+    должна быть уникальной.
+    """
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        return cursor._replace(offset=0)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, name))
+        return json.dumps([str(value) for value in values])
+
+    def decode_position(self, queryset, position):
+        try:
+            values = json.loads(position)
+            if (
+                not isinstance(values, list)
+                or len(values) != len(self.ordering)
+            ):
+                raise ValueError
+            return [
+                queryset.query.resolve_ref(
+                    field.lstrip('-')
+                ).output_field.to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def filter_position(self, queryset, position, reverse):
+        values = self.decode_position(queryset, position)
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') != reverse else '__gt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        reverse, current_position = False, None
+        if self.cursor is not None:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = self.filter_position(
+                queryset, current_position, reverse
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class RecipeCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация ленты рецептов по (created_at, id)."""
+
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = page_size
+    ordering = ('-created_at', '-id')
+
+
+class RankingCursorPagination(RecipeCursorPagination):
+    """Курсорная пагинация по позиции рецепта в рейтинге.
+
+    Ожидает в queryset аннотацию rank с уникальной позицией.
+    """
+
+    ordering = ('rank',)
@@ -1,12 +1,46 @@
 from rest_framework import serializers
 
+from api.v1.fields import Base64ImageField, BulkPrimaryKeyRelatedField
+from api.v1.mixins import MeasuredRepresentationMixin
 from foods.models import Recipe
 
 
-class RecipeShortReadSerializer(serializers.ModelSerializer):
+class RecipeShortReadSerializer(
+    MeasuredRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор короткого представления рецепта."""
 
+    image = Base64ImageField(variant='thumb', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """ListSerializer с пакетной загрузкой связанных объектов.
+
+    Объекты полей BulkPrimaryKeyRelatedField всех элементов списка
+    загружаются одним запросом на поле.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        errors = {}
+        for field in self.child._writable_fields:
+            if not isinstance(field, BulkPrimaryKeyRelatedField):
+                continue
+            present = [item for item in items if field.source in item]
+            try:
+                objects = field.resolve(
+                    [item[field.source] for item in present]
+                )
+            except serializers.ValidationError as error:
+                errors[field.field_name] = error.detail
+                continue
+            for item, obj in zip(present, objects):
+                item[field.source] = obj
+        if errors:
+            raise serializers.ValidationError(errors)
+        return items
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.v1.foods.async_views import ingredient_list, tag_list
 from api.v1.foods.views import (
     IngredientViewSet,
     RecipeViewSet,
@@ -20,7 +22,16 @@ router_api_v1.register(
 )
 router_api_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASGI_MODE:
+    # Асинхронные обработчики списков, детальные страницы - у ViewSet.
+    urlpatterns += [
+        path('tags/', tag_list),
+        path('ingredients/', ingredient_list),
+    ]
+
+urlpatterns += [
     path('', include(router_api_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
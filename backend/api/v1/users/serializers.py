@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from api.v1.fields import Base64ImageField
-from api.v1.mixins import UserameNotMeMixin
+from api.v1.mixins import MeasuredRepresentationMixin, UserameNotMeMixin
 from api.v1.serializers import RecipeShortReadSerializer
 from api.v1.utils import check_field
 
@@ -34,7 +34,9 @@ class UserWriteSerializer(serializers.ModelSerializer, UserameNotMeMixin):
         return user
 
 
-class UserReadSerializer(serializers.ModelSerializer):
+class UserReadSerializer(
+    MeasuredRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор для чтения пользователей."""
 
     is_subscribed = serializers.SerializerMethodField(
@@ -61,6 +63,11 @@ class UserReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        relations = self.context.get('relations')
+        if relations is not None:
+            return obj.id in relations['follows']
         obj = obj.subscribers.all()
         return check_field(self, obj)
 
@@ -69,7 +76,6 @@ class FollowSerializer(UserReadSerializer):
     """Сериализатор подписок пользователя."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
 
     class Meta:
         model = User
@@ -105,6 +111,12 @@ class FollowSerializer(UserReadSerializer):
         return data
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeShortReadSerializer(
+                obj.recipes_preview,
+                read_only=True,
+                many=True
+            ).data
         request = self.context.get('request')
         recipes = obj.recipes.all()
         recipes_limit = request.query_params.get('recipes_limit')
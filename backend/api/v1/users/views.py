@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BooleanField, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
@@ -12,6 +14,8 @@ from .serializers import (
     UserReadSerializer,
     UserWriteSerializer
 )
+from api.v1.mixins import UserRelationsMixin
+from foods.models import Recipe
 from users.models import Follow
 
 
@@ -19,6 +23,7 @@ User = get_user_model()
 
 
 class UserViewSet(
+    UserRelationsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -39,9 +44,23 @@ class UserViewSet(
 
     def get_queryset(self):
         if self.action in ['subscriptions']:
-            return User.objects.filter(subscribers__user=self.request.user)
+            return self.get_subscriptions_queryset()
         return super().get_queryset()
 
+    def get_subscriptions_queryset(self):
+        user = self.request.user
+        recipes = Recipe.objects.filter(author__subscribers__user=user)
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        try:
+            recipes = recipes.limit_per_author(int(recipes_limit))
+        except (TypeError, ValueError):
+            pass
+        return User.objects.filter(subscribers__user=user).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        )
+
     @action(
         detail=False,
         methods=['GET'],
@@ -100,6 +119,7 @@ class UserViewSet(
         permission_classes=(IsAuthenticated,),
         url_path='subscribe'
     )
+    @transaction.atomic
     def subscribe(self, request, pk=None):
         """Подписаться на пользователя."""
         user = get_object_or_404(User, pk=pk)
@@ -113,9 +133,12 @@ class UserViewSet(
             following=user,
             user=request.user
         )
+        # Кэш связей ещё не знает о новой подписке.
+        user.is_subscribed = True
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def delete_subscribe(self, request, pk=None):
         """Отписаться от пользователя."""
         user = get_object_or_404(User, pk=pk)
@@ -1,5 +1,5 @@
 NAME_LENGTH = 20
-SHORT_URL_LENGTH = 6
+SHORT_URL_LENGTH = 7
 RECIPE_NAME_MAX_LENGTH = 256
 TAG_NAME_MAX_LENGTH = 32
 TAG_SLUG_MAX_LENGTH = 32
@@ -11,3 +11,25 @@ FIRST_NAME_MAX_LENGTH = 150
 LAST_NAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
 PAGE_SIZE = 6
+SHOPPING_CART_FILENAME = 'shopping'
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+COUNT_CACHE_TIMEOUT = 30
+COUNT_ESTIMATE_THRESHOLD = 10000
+RANKING_FAVORITE_WEIGHT = 1.0
+RANKING_CART_WEIGHT = 0.5
+RANKING_POPULAR_HALF_LIFE_DAYS = 90
+RANKING_TRENDING_HALF_LIFE_DAYS = 3
+RANKING_BATCH_SIZE = 5000
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_VARIANTS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1280,
+}
+MEDIA_BATCH_SIZE = 1000
+SHORT_LINK_CACHE_SIZE = 10000
+ANONYMOUS_CACHE_MAX_AGE = 60
+RECIPE_BATCH_MAX_SIZE = 500
+SHOPPING_LIST_BATCH_SIZE = 500
+SHOPPING_CART_CACHE_MAX_SIZE = 256 * 1024
@@ -0,0 +1,256 @@
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('foodgram.metrics')
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RouteStats:
+    """Гистограмма времени ответа одного маршрута."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.db_total = 0.0
+        self.queries = 0
+
+    def observe(self, duration, db_duration, queries):
+        self.buckets[bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.db_total += db_duration
+        self.queries += queries
+
+
+class MetricsRegistry:
+    """Метрики запросов процесса в разрезе маршрутов."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = defaultdict(RouteStats)
+
+    def observe(self, route, method, duration, db_duration, queries):
+        with self._lock:
+            self.routes[route, method].observe(
+                duration,
+                db_duration,
+                queries
+            )
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        name = 'foodgram_request_duration_seconds'
+        lines = [
+            f'# HELP {name} Время обработки запроса.',
+            f'# TYPE {name} histogram',
+        ]
+        db_lines = [
+            '# HELP foodgram_request_db_seconds_total Время SQL-запросов.',
+            '# TYPE foodgram_request_db_seconds_total counter',
+        ]
+        query_lines = [
+            '# HELP foodgram_request_queries_total Число SQL-запросов.',
+            '# TYPE foodgram_request_queries_total counter',
+        ]
+        with self._lock:
+            for (route, method), stats in sorted(self.routes.items()):
+                labels = 'route="{}",method="{}"'.format(
+                    route.replace('\\', '\\\\').replace('"', '\\"'),
+                    method
+                )
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{{{labels}}} {stats.total}')
+                lines.append(f'{name}_count{{{labels}}} {stats.count}')
+                db_lines.append(
+                    'foodgram_request_db_seconds_total'
+                    f'{{{labels}}} {stats.db_total}'
+                )
+                query_lines.append(
+                    'foodgram_request_queries_total'
+                    f'{{{labels}}} {stats.queries}'
+                )
+        return '\n'.join(lines + db_lines + query_lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """Обертка connection.execute_wrapper для учета SQL-запросов.
+
+    Заодно копит время сериализации ответа.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+# Таймер текущего запроса: синхронный код под ASGI выполняется
+# в другом потоке со своим соединением, а контекст переходит вместе с ним.
+current_timer = ContextVar('current_timer', default=None)
+
+
+def context_timer(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_context_timer(sender, connection, **kwargs):
+    if context_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(context_timer)
+
+
+@contextmanager
+def serializer_phase():
+    """Учет времени сериализации в метриках текущего запроса.
+
+    Вложенные сериализаторы учитываются в рамках внешнего.
+    """
+    timer = current_timer.get()
+    if timer is None or timer.serializing:
+        yield
+        return
+    timer.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.serializing = False
+        timer.serialize += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware:
+    """Замер времени запроса, SQL и рендеринга ответа.
+
+    Результат отдается в заголовке Server-Timing, пишется в лог
+    на уровне INFO и копится в гистограммах для /api/_metrics. Доля замеряемых
+    запросов задается настройкой METRICS_SAMPLE_RATE. Под ASGI работает
+    асинхронно, чтобы не переводить асинхронные view в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            # Признак, по которому Django вызывает middleware через await.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        install_context_timer(None, connection)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.observe(request, response, start, timer)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return await self.get_response(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.observe(request, response, start, timer)
+
+    def observe(self, request, response, start, timer):
+        duration = time.perf_counter() - start
+        render = getattr(request, '_metrics_render', 0.0)
+        match = request.resolver_match
+        route = (
+            '/' + match.route.removeprefix('^').removesuffix('$')
+            if match else 'unmatched'
+        )
+        registry.observe(
+            route,
+            request.method,
+            duration,
+            timer.duration,
+            timer.count
+        )
+        response['Server-Timing'] = (
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} SQL", '
+            f'serialize;dur={timer.serialize * 1000:.1f}, '
+            f'render;dur={render * 1000:.1f}, '
+            f'total;dur={duration * 1000:.1f}'
+        )
+        logger.info(json.dumps({
+            'method': request.method,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_ms': round(timer.duration * 1000, 2),
+            'queries': timer.count,
+            'serialize_ms': round(timer.serialize * 1000, 2),
+            'render_ms': round(render * 1000, 2),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """Метрики процесса в формате Prometheus."""
+    token = settings.METRICS_TOKEN
+    authorized = (
+        token and request.headers.get('Authorization') == f'Bearer {token}'
+    )
+    if not (settings.DEBUG or authorized):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
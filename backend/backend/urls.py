@@ -3,7 +3,10 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from api.v1.foods.views import redirect_view
+if settings.ASGI_MODE:
+    from api.v1.foods.async_views import redirect_view
+else:
+    from api.v1.foods.views import redirect_view
 
 
 urlpatterns = [
@@ -2,4 +2,8 @@ python manage.py makemigrations
 python manage.py migrate
 python manage.py collectstatic
 cp -r /app/collected_static/. /backend_static/static/
-gunicorn --bind 0.0.0.0:8000 backend.wsgi
\ No newline at end of file
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn --bind 0.0.0.0:8000 --workers "${GUNICORN_WORKERS:-1}" --worker-class uvicorn.workers.UvicornWorker backend.asgi
+else
+    gunicorn --bind 0.0.0.0:8000 --workers "${GUNICORN_WORKERS:-1}" backend.wsgi
+fi
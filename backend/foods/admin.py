@@ -7,8 +7,10 @@ from .models import (
     Recipe,
     ShoppingCart,
     Tag,
+    TagRecipe,
     URLRecipe
 )
+from .shopping_lists import ingredient_amounts, recipe_amounts_changed
 
 
 admin.site.empty_value_display = 'Не задано'
@@ -22,6 +24,14 @@ class IngredientRecipeInline(admin.TabularInline):
     extra = 0
 
 
+class TagRecipeInline(admin.TabularInline):
+    """Блок с формой для тегов."""
+
+    model = TagRecipe
+    min_num = 1
+    extra = 0
+
+
 @admin.register(URLRecipe)
 class URLRecipeAdmin(admin.ModelAdmin):
     list_display = (
@@ -50,19 +60,28 @@ class RecipeAdmin(admin.ModelAdmin):
         'tags',
     )
     filter_horizontal = (
-        'tags',
-        'ingredients'
+        'ingredients',
     )
     list_display_links = (
         'name',
     )
     inlines = (
         IngredientRecipeInline,
+        TagRecipeInline,
     )
 
+    def save_related(self, request, form, formsets, change):
+        old = ingredient_amounts([form.instance.pk]) if change else {}
+        super().save_related(request, form, formsets, change)
+        recipe_amounts_changed(
+            form.instance.pk,
+            old,
+            ingredient_amounts([form.instance.pk])
+        )
+
     @admin.display(description='Количество добавлений в "Избранное"')
     def count_is_favorite(self, obj):
-        return obj.favorites.all().count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
@@ -6,3 +6,6 @@ class FoodsConfig(AppConfig):
     name = 'foods'
     verbose_name = 'Еда'
     verbose_name_plural = 'еда'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,72 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+INGREDIENTS_VERSION_KEY = 'ingredients:version'
+TAGS_VERSION_KEY = 'tags:version'
+SHORT_LINKS_VERSION_KEY = 'short_links:version'
+RECIPES_LIST_VERSION_KEY = 'recipes:list:version'
+
+
+def recipe_version_key(pk):
+    return f'recipe:{pk}:version'
+
+
+def author_version_key(pk):
+    return f'author:{pk}:version'
+
+
+def relations_version_key(pk):
+    return f'relations:{pk}:version'
+
+
+def cart_version_key(pk):
+    return f'cart:{pk}:version'
+
+
+def get_version(key):
+    """Текущая версия данных, общая для всех процессов.
+
+    Версия - время последнего изменения в наносекундах, поэтому
+    по ней же можно отдавать Last-Modified.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(keys, initial=None):
+    """Текущие версии нескольких ключей за одно обращение к кешу.
+
+    Отсутствующие ключи получают версию initial или текущее время.
+    """
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = initial or time.time_ns()
+        for key in missing:
+            cache.add(key, version, timeout=None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def bump_version(key):
+    """Смена версии данных, сбрасывающая кеши процессов."""
+    version = time.time_ns()
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_versions(keys):
+    version = time.time_ns()
+    cache.set_many(dict.fromkeys(keys, version), timeout=None)
+    return version
+
+
+def bump_on_commit(keys):
+    """Смена версий после коммита, чтобы в кеш не попали старые данные."""
+    transaction.on_commit(partial(bump_versions, keys))
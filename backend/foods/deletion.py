@@ -0,0 +1,29 @@
+from django.db.models import CASCADE
+
+
+class RelationsCascade:
+    """Строки избранного и списка покупок, удаляемые одним каскадом."""
+
+    def __init__(self, collector):
+        self.collector = collector
+        self.rows = {}
+        self.handled = False
+
+    def deleted_pks(self, model):
+        """id удаляемых вместе со строками объектов модели."""
+        return {obj.pk for obj in self.collector.data.get(model, ())}
+
+
+def cascade_relations(collector, field, sub_objs, using):
+    """CASCADE, который собирает удаляемые связи в общий набор.
+
+    Строка, попавшая в удаление по рецепту и по пользователю, учитывается
+    один раз. Сигналы обрабатывают набор целиком при первом pre_delete.
+    """
+    CASCADE(collector, field, sub_objs, using)
+    cascade = getattr(collector, 'relations_cascade', None)
+    if cascade is None:
+        cascade = collector.relations_cascade = RelationsCascade(collector)
+    for obj in sub_objs:
+        cascade.rows.setdefault((type(obj), obj.pk), obj)
+        obj._cascade = cascade
@@ -0,0 +1,100 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from backend.constants import IMAGE_VARIANTS
+from .cache import bump_on_commit, recipe_version_key
+from .models import Recipe
+from .storage import media_names, update_references
+
+
+logger = logging.getLogger('foodgram.images')
+
+executor = (
+    ThreadPoolExecutor(settings.IMAGE_WORKERS, thread_name_prefix='images')
+    if settings.IMAGE_WORKERS else None
+)
+
+
+def variants_outdated(recipe):
+    """Сгенерированы ли размеры для текущего изображения рецепта."""
+    return bool(recipe.image) and (
+        recipe.image_variants.get('source') != recipe.image.name
+    )
+
+
+def schedule_variants(recipe):
+    """Постановка генерации размеров в очередь после коммита транзакции."""
+    transaction.on_commit(partial(submit, recipe.pk, recipe.image.name))
+
+
+def submit(pk, name):
+    if executor is None:
+        generate_variants(pk, name)
+    else:
+        executor.submit(run_in_worker, pk, name)
+
+
+def run_in_worker(pk, name):
+    close_old_connections()
+    try:
+        generate_variants(pk, name)
+    finally:
+        close_old_connections()
+
+
+def resize(image, size):
+    variant = image.copy()
+    variant.thumbnail((size, size))
+    if image.format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(buffer, format=image.format, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_variants(pk, name):
+    """Генерация размеров изображения рецепта.
+
+    Результат записывается, только если изображение рецепта за это время
+    не поменялось.
+    """
+    field = Recipe._meta.get_field('image')
+    storage = field.storage
+    root, ext = os.path.splitext(name)
+    tail = os.path.basename(root)
+    try:
+        with storage.open(name) as file, Image.open(file) as image:
+            image.load()
+            variants = {'source': name}
+            for variant, size in IMAGE_VARIANTS.items():
+                variants[variant] = storage.save(
+                    os.path.join(
+                        field.upload_to, 'variants', f'{tail}_{variant}{ext}'
+                    ),
+                    resize(image, size)
+                )
+        recipe = Recipe.objects.filter(pk=pk).only(
+            'image', 'image_variants'
+        ).first()
+        if recipe is None:
+            return
+        old_names = media_names(recipe)
+        recipe.image_variants = variants
+        with transaction.atomic():
+            updated = Recipe.objects.filter(pk=pk, image=name).update(
+                image_variants=variants
+            )
+            if updated:
+                update_references(old_names, media_names(recipe))
+        if updated:
+            bump_on_commit([recipe_version_key(pk)])
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s.', name)
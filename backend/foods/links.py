@@ -0,0 +1,109 @@
+import hashlib
+import string
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from backend.constants import SHORT_LINK_CACHE_SIZE, SHORT_URL_LENGTH
+from .cache import SHORT_LINKS_VERSION_KEY, get_version
+from .models import URLRecipe
+
+
+class ShortLinkCodec:
+    """Взаимно однозначное кодирование id рецепта в короткую ссылку.
+
+    id переставляется внутри [0, 62 ** length) линейной функцией
+    id * multiplier + offset с ключом из настроек, затем записывается
+    в base62 фиксированной длины. Соседние id дают непохожие ссылки,
+    а для декодирования база не нужна.
+    """
+
+    alphabet = string.digits + string.ascii_letters
+
+    def __init__(self, key, length=SHORT_URL_LENGTH):
+        self.length = length
+        self.modulus = len(self.alphabet) ** length
+        digest = int.from_bytes(hashlib.sha256(key.encode()).digest(), 'big')
+        multiplier = digest % self.modulus | 1
+        while multiplier % 31 == 0:
+            multiplier += 2
+        self.multiplier = multiplier
+        self.inverse = pow(multiplier, -1, self.modulus)
+        self.offset = (digest >> 128) % self.modulus
+        self.index = {char: i for i, char in enumerate(self.alphabet)}
+
+    def encode(self, pk):
+        number = (pk * self.multiplier + self.offset) % self.modulus
+        chars = []
+        for _ in range(self.length):
+            number, digit = divmod(number, len(self.alphabet))
+            chars.append(self.alphabet[digit])
+        return ''.join(reversed(chars))
+
+    def decode(self, code):
+        """id рецепта по короткой ссылке или None для чужих ссылок."""
+        if len(code) != self.length:
+            return None
+        number = 0
+        for char in code:
+            if char not in self.index:
+                return None
+            number = number * len(self.alphabet) + self.index[char]
+        pk = (number - self.offset) * self.inverse % self.modulus
+        return pk or None
+
+
+class ShortLinkCache:
+    """LRU-кеш старых ссылок URLRecipe в памяти процесса.
+
+    При первом обращении заполняется последними ссылками из базы.
+    Кешируются и отсутствующие ссылки. Кеш сбрасывается при смене версии
+    ссылок, которую меняют сигналы URLRecipe.
+    """
+
+    missing = object()
+
+    def __init__(self, maxsize=SHORT_LINK_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.version = None
+        self.urls = OrderedDict()
+
+    def warm(self):
+        links = URLRecipe.objects.order_by('-id').values_list(
+            'short_url', 'full_url'
+        )[:self.maxsize]
+        self.urls = OrderedDict(reversed(links))
+
+    def refresh(self):
+        version = get_version(SHORT_LINKS_VERSION_KEY)
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    if self.version is None:
+                        self.warm()
+                    else:
+                        self.urls = OrderedDict()
+                    self.version = version
+
+    def resolve(self, code):
+        """Полный URL по короткой ссылке или None."""
+        self.refresh()
+        with self._lock:
+            url = self.urls.get(code, self.missing)
+            if url is not self.missing:
+                self.urls.move_to_end(code)
+                return url
+        url = URLRecipe.objects.filter(short_url=code).values_list(
+            'full_url', flat=True
+        ).first()
+        with self._lock:
+            self.urls[code] = url
+            if len(self.urls) > self.maxsize:
+                self.urls.popitem(last=False)
+        return url
+
+
+short_links = ShortLinkCache()
+short_link_codec = ShortLinkCodec(settings.SHORT_LINK_KEY)
@@ -0,0 +1,108 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = max(0, round(percent / 100 * len(values) + 0.5) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер p50/p95, числа SQL-запросов и пиковой памяти '
+        'на основных эндпоинтах API. Результат - JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя (по умолчанию - с наибольшей корзиной).'
+        )
+        parser.add_argument('--ingredient-query', default='са')
+        parser.add_argument('--output', help='Файл для записи JSON.')
+
+    def get_user(self, user_id):
+        if user_id:
+            return User.objects.filter(pk=user_id).first()
+        return User.objects.annotate(
+            carts=Count('shopping_carts')
+        ).order_by('-carts').first()
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, client, url):
+        timings, queries, statuses = [], [], set()
+        for _ in range(self.requests):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = self.request(client, url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+            statuses.add(response.status_code)
+        # Память меряется отдельным запросом: tracemalloc замедляет код.
+        tracemalloc.start()
+        self.request(client, url)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'status': sorted(statuses),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+            'peak_memory_kb': round(peak_memory / 1024, 1),
+        }
+
+    def handle(self, *args, **options):
+        self.requests = options['requests']
+        user = self.get_user(options['user'])
+        if user is None:
+            raise CommandError(
+                'Нет пользователей, сначала выполните seed_data.'
+            )
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        endpoints = {
+            'recipes': '/api/recipes/',
+            'recipes_filtered': '/api/recipes/?tags=breakfast&tags=lunch',
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'ingredients': '/api/ingredients/?name={}'.format(
+                options['ingredient_query']
+            ),
+            'download_shopping_cart': '/api/recipes/download_shopping_cart/',
+        }
+        with override_settings(ALLOWED_HOSTS=['*']):
+            results = {
+                name: self.measure(client, url)
+                for name, url in endpoints.items()
+            }
+        report = json.dumps(
+            {'user': user.pk, 'requests': self.requests, 'results': results},
+            ensure_ascii=False,
+            indent=2
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_api import percentile
+from foods.links import short_link_codec
+from foods.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузка на запущенный сервер заданным числом одновременных '
+        'соединений: пропускная способность и хвост задержек. '
+        'Результат - JSON, сравнение с прошлым запуском - --compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=15,
+            help='Длительность нагрузки на каждый эндпоинт, секунд.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--ingredient-query', default='са')
+        parser.add_argument(
+            '--label',
+            default='',
+            help='Метка запуска, например wsgi или asgi.'
+        )
+        parser.add_argument('--output', help='Файл для записи JSON.')
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого запуска для сравнения.'
+        )
+
+    def get_endpoints(self, ingredient_query):
+        recipe = Recipe.objects.only('id').first()
+        if recipe is None:
+            raise CommandError('Нет рецептов, сначала выполните seed_data.')
+        return {
+            'redirect': f'/s/{short_link_codec.encode(recipe.id)}/',
+            'ingredients': f'/api/ingredients/?name={ingredient_query}'
+                           '&limit=10',
+            'tags': '/api/tags/',
+            'recipes': '/api/recipes/',
+        }
+
+    async def read_response(self, reader):
+        """Статус ответа и признак keep-alive, тело читается целиком."""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers.get('connection') != 'close'
+
+    async def worker(self, path, deadline, result):
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            'Connection: keep-alive\r\n\r\n'
+        ).encode()
+        writer = None
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        self.hostname,
+                        self.port
+                    )
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(
+                    self.read_response(reader),
+                    self.timeout
+                )
+            except (OSError, ValueError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError, asyncio.TimeoutError):
+                result['errors'] += 1
+                keep_alive = False
+            else:
+                result['latencies'].append(time.perf_counter() - start)
+                result['statuses'][status] += 1
+            if not keep_alive and writer is not None:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    async def measure(self, path):
+        result = {'latencies': [], 'errors': 0, 'statuses': Counter()}
+        start = time.perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*(
+            self.worker(path, deadline, result)
+            for _ in range(self.connections)
+        ))
+        elapsed = time.perf_counter() - start
+        timings = [latency * 1000 for latency in result['latencies']]
+        if not timings:
+            return {'requests': 0, 'errors': result['errors']}
+        return {
+            'requests': len(timings),
+            'errors': result['errors'],
+            'statuses': dict(sorted(result['statuses'].items())),
+            'rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'max_ms': round(max(timings), 2),
+        }
+
+    async def run(self, endpoints):
+        return {
+            name: await self.measure(path)
+            for name, path in endpoints.items()
+        }
+
+    def compare(self, results, path):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)
+        self.stdout.write(
+            f'{"эндпоинт":<14}{"rps":>22}{"p99, мс":>24}'
+        )
+        for name, current in results.items():
+            before = previous['results'].get(name, {})
+            self.stdout.write('{:<14}{:>22}{:>24}'.format(
+                name,
+                f'{before.get("rps", "-")} -> {current.get("rps", "-")}',
+                f'{before.get("p99_ms", "-")} -> {current.get("p99_ms", "-")}'
+            ))
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        self.host = url.netloc
+        self.hostname = url.hostname
+        self.port = url.port or 80
+        self.connections = options['connections']
+        self.duration = options['duration']
+        self.timeout = options['timeout']
+        endpoints = self.get_endpoints(options['ingredient_query'])
+        results = asyncio.run(self.run(endpoints))
+        report = json.dumps(
+            {
+                'label': options['label'],
+                'url': options['url'],
+                'connections': self.connections,
+                'duration': self.duration,
+                'results': results,
+            },
+            ensure_ascii=False,
+            indent=2
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        self.stdout.write(report)
+        if options['compare']:
+            self.compare(results, options['compare'])
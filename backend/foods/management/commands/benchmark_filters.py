@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from backend.constants import PAGE_SIZE
+from foods.models import Favorite, Recipe, Tag, TagRecipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение планов и времени фильтрации рецептов: '
+        'JOIN + DISTINCT против EXISTS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tags', nargs='+', help='Слаги тегов.')
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя для фильтра избранного.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        tags = options['tags'] or list(
+            Tag.objects.values_list('slug', flat=True)[:2]
+        )
+        if not tags:
+            raise CommandError('В базе нет тегов.')
+        querysets = {
+            'tags: join + distinct': Recipe.objects.filter(
+                tags__slug__in=tags
+            ).distinct(),
+            'tags: exists': Recipe.objects.filter(Exists(
+                TagRecipe.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag__slug__in=tags
+                )
+            )),
+        }
+        if options['user']:
+            user = options['user']
+            querysets['favorites: join'] = Recipe.objects.filter(
+                favorites__user=user
+            )
+            querysets['favorites: exists'] = Recipe.objects.filter(Exists(
+                Favorite.objects.filter(recipe=OuterRef('pk'), user=user)
+            ))
+        analyze = connection.vendor == 'postgresql'
+        for title, queryset in querysets.items():
+            page = queryset[:PAGE_SIZE]
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(page.values_list('id', flat=True))
+                queryset.count()
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{title}: медиана {statistics.median(timings):.2f} мс '
+                '(страница + count)'
+            ))
+            if analyze:
+                self.stdout.write(page.explain(analyze=True, buffers=True))
+            else:
+                self.stdout.write(page.explain())
+            self.stdout.write('')
@@ -0,0 +1,82 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from foods.models import MediaBlob, Recipe
+from foods.storage import media_names, register_blobs, set_references
+
+
+User = get_user_model()
+
+
+def walk(storage, path=''):
+    """Имена всех файлов хранилища."""
+    directories, files = storage.listdir(path)
+    for file in files:
+        yield f'{path}/{file}' if path else file
+    for directory in directories:
+        yield from walk(storage, f'{path}/{directory}' if path else directory)
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов медиа, на которые не осталось ссылок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Пересчитать ссылки по базе и файлам хранилища.'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help='Удалять файлы без ссылок старше стольких минут.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            self.recount()
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+        orphans = MediaBlob.objects.filter(refcount=0, updated_at__lt=cutoff)
+        deleted = 0
+        for blob in orphans.iterator():
+            if options['dry_run']:
+                self.stdout.write(blob.name)
+                continue
+            # DELETE блокирует запись и заново проверяет условие, а файл
+            # удаляется до снятия блокировки: параллельное сохранение того же
+            # файла дождется коммита и запишет его заново.
+            with transaction.atomic():
+                count, _ = MediaBlob.objects.filter(
+                    pk=blob.pk, refcount=0, updated_at__lt=cutoff
+                ).delete()
+                if count:
+                    default_storage.delete(blob.name)
+                    deleted += 1
+        self.stdout.write(self.style.SUCCESS(f'Удалено файлов: {deleted}.'))
+
+    @transaction.atomic
+    def recount(self):
+        references = Counter()
+        for queryset in (
+            Recipe.objects.only('image', 'image_variants'),
+            User.objects.only('avatar'),
+        ):
+            for instance in queryset.iterator():
+                references.update(media_names(instance))
+        register_blobs(walk(default_storage), touch=False)
+        register_blobs(references, touch=False)
+        MediaBlob.objects.exclude(refcount=0).update(refcount=0)
+        set_references(references, lambda count: count)
+        self.stdout.write(f'Ссылок на файлы: {len(references)}.')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from foods.images import generate_variants, variants_outdated
+from foods.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация размеров изображений для рецептов, у которых их нет '
+        'или они устарели.'
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        recipes = Recipe.objects.only('id', 'image', 'image_variants')
+        for recipe in recipes.iterator():
+            if variants_outdated(recipe):
+                generate_variants(recipe.pk, recipe.image.name)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {count}.'
+        ))
@@ -2,6 +2,7 @@ import json
 
 from django.core.management.base import BaseCommand, CommandError
 
+from foods.cache import INGREDIENTS_VERSION_KEY, bump_version
 from foods.models import Ingredient
 
 
@@ -13,6 +14,7 @@ class Command(BaseCommand):
                 Ingredient.objects.bulk_create(
                     Ingredient(**ingredient) for ingredient in ingredients_data
                 )
+                bump_version(INGREDIENTS_VERSION_KEY)
                 self.stdout.write(
                     self.style.SUCCESS(
                         f'Успешно импортировано {Ingredient.objects.count()}.'
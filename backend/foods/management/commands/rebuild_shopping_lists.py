@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.constants import SHOPPING_LIST_BATCH_SIZE
+from foods.cache import bump_on_commit, cart_version_key
+from foods.models import ShoppingListItem
+from foods.shopping_lists import expected_shopping_lists
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка списков покупок с рецептами в них и исправление '
+        'расхождений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать число расхождений.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.order_by('pk').values_list(
+            'pk',
+            flat=True
+        ))
+        totals = {'missing': 0, 'changed': 0, 'extra': 0}
+        for start in range(0, len(user_ids), SHOPPING_LIST_BATCH_SIZE):
+            batch = user_ids[start:start + SHOPPING_LIST_BATCH_SIZE]
+            with transaction.atomic():
+                for name, count in self.rebuild(
+                    batch,
+                    options['dry_run']
+                ).items():
+                    totals[name] += count
+        self.stdout.write(
+            'Не хватало строк: {missing}, неверное количество: {changed}, '
+            'лишних строк: {extra}.'.format(**totals)
+        )
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Списки покупок сверены.'))
+
+    def rebuild(self, user_ids, dry_run):
+        """Сверка и исправление списков покупок пачки пользователей."""
+        expected = expected_shopping_lists(user_ids)
+        missing, changed, extra = [], [], []
+        users = set()
+        for item in ShoppingListItem.objects.filter(user_id__in=user_ids):
+            total = expected[item.user_id].pop(item.ingredient_id, None)
+            if total is None:
+                extra.append(item.pk)
+                users.add(item.user_id)
+            elif total != item.total_amount:
+                item.total_amount = total
+                changed.append(item)
+                users.add(item.user_id)
+        for user_id, amounts in expected.items():
+            if amounts:
+                users.add(user_id)
+            missing.extend(
+                ShoppingListItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total
+                )
+                for ingredient_id, total in amounts.items()
+            )
+        if not dry_run:
+            ShoppingListItem.objects.filter(pk__in=extra).delete()
+            ShoppingListItem.objects.bulk_update(
+                changed,
+                ['total_amount'],
+                batch_size=SHOPPING_LIST_BATCH_SIZE
+            )
+            ShoppingListItem.objects.bulk_create(
+                missing,
+                batch_size=SHOPPING_LIST_BATCH_SIZE
+            )
+            bump_on_commit([cart_version_key(pk) for pk in users])
+        return {
+            'missing': len(missing),
+            'changed': len(changed),
+            'extra': len(extra),
+        }
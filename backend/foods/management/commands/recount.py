@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from foods.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow
+
+
+User = get_user_model()
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Follow, 'following'),
+)
+
+
+def actual_count(model, field):
+    """Подзапрос с фактическим числом строк model на объект."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('pk')
+            ).values('count')
+        ),
+        Value(0)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет денормализованных счетчиков избранного, списков покупок, '
+        'рецептов и подписчиков.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for model, counter, related_model, field in COUNTERS:
+            fixed = model.objects.annotate(
+                actual=actual_count(related_model, field)
+            ).exclude(
+                **{counter: F('actual')}
+            ).update(
+                **{counter: actual_count(related_model, field)}
+            )
+            self.stdout.write(
+                f'{model._meta.model_name}.{counter}: исправлено {fixed}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from foods.ranking import refresh_ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет рейтинга рецептов для сортировок popular и trending. '
+        'Рассчитан на запуск по расписанию, например из cron.'
+    )
+
+    def handle(self, *args, **options):
+        count = refresh_ranking()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {count} рецептов.'
+        ))
@@ -0,0 +1,160 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foods.cache import (
+    INGREDIENTS_VERSION_KEY,
+    TAGS_VERSION_KEY,
+    bump_version
+)
+from foods.models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TagRecipe
+)
+from users.models import Follow
+
+
+User = get_user_model()
+
+SEED_TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочного тестирования.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument(
+            '--ingredients-per-recipe',
+            type=int,
+            default=8
+        )
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def bulk_create(self, model, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def new_ids(self, model, objects):
+        """Создание объектов и получение id добавленных записей."""
+        last_id = model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        self.bulk_create(model, objects)
+        return list(
+            model.objects.filter(id__gt=last_id).values_list('id', flat=True)
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+        prefix = f'seed{rng.randrange(10 ** 9)}'
+        password = make_password('password')
+
+        with transaction.atomic():
+            for name, slug in SEED_TAGS:
+                Tag.objects.get_or_create(slug=slug, defaults={'name': name})
+            tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+            user_ids = self.new_ids(User, (
+                User(
+                    username=f'{prefix}_{i}',
+                    email=f'{prefix}_{i}@example.com',
+                    first_name='Имя',
+                    last_name='Фамилия',
+                    password=password
+                )
+                for i in range(options['users'])
+            )) or list(User.objects.values_list('id', flat=True))
+            ingredient_ids = self.new_ids(Ingredient, (
+                Ingredient(
+                    name=f'{prefix} ингредиент {i}',
+                    measurement_unit='г'
+                )
+                for i in range(options['ingredients'])
+            )) or list(Ingredient.objects.values_list('id', flat=True))
+            recipe_ids = self.new_ids(Recipe, (
+                Recipe(
+                    name=f'{prefix} рецепт {i}',
+                    text='Описание рецепта.',
+                    cooking_time=rng.randint(1, 180),
+                    author_id=rng.choice(user_ids),
+                    image='recipes/images/seed.png'
+                )
+                for i in range(options['recipes'])
+            ))
+            per_recipe = min(
+                options['ingredients_per_recipe'],
+                len(ingredient_ids)
+            )
+            self.bulk_create(IngredientRecipe, (
+                IngredientRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500)
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+            ))
+            self.bulk_create(TagRecipe, (
+                TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids,
+                    rng.randint(1, len(tag_ids))
+                )
+            ))
+            for model, count in (
+                (Favorite, options['favorites']),
+                (ShoppingCart, options['carts']),
+            ):
+                count = min(count, len(recipe_ids))
+                self.bulk_create(model, (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in rng.sample(recipe_ids, count)
+                ))
+            follows = min(options['follows'], len(user_ids) - 1)
+            self.bulk_create(Follow, (
+                Follow(user_id=user_id, following_id=following_id)
+                for user_id in user_ids
+                for following_id in rng.sample(user_ids, follows + 1)
+                if following_id != user_id
+            ))
+
+        call_command('recount', stdout=self.stdout)
+        call_command('refresh_ranking', stdout=self.stdout)
+        call_command('rebuild_shopping_lists', stdout=self.stdout)
+        bump_version(INGREDIENTS_VERSION_KEY)
+        bump_version(TAGS_VERSION_KEY)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, '
+            f'рецептов {len(recipe_ids)}, '
+            f'ингредиентов {len(ingredient_ids)}. '
+            f'Пароль пользователей: password.'
+        ))
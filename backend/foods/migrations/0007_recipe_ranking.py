@@ -0,0 +1,41 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0006_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='foods.recipe', verbose_name='Рецепт')),
+                ('popular_score', models.FloatField(verbose_name='Популярность')),
+                ('trending_score', models.FloatField(verbose_name='Набирает популярность')),
+                ('popular_rank', models.PositiveIntegerField(unique=True, verbose_name='Позиция по популярности')),
+                ('trending_rank', models.PositiveIntegerField(unique=True, verbose_name='Позиция по набору популярности')),
+            ],
+            options={
+                'verbose_name': 'рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинг рецептов',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+    ]
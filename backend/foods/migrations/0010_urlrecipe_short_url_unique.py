@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:29
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    """Удаление повторов short_url, остается самая ранняя ссылка."""
+    URLRecipe = apps.get_model('foods', 'URLRecipe')
+    duplicates = URLRecipe.objects.values('short_url').annotate(
+        first_id=Min('id'),
+        count=Count('id')
+    ).filter(count__gt=1)
+    for duplicate in duplicates:
+        URLRecipe.objects.filter(
+            short_url=duplicate['short_url']
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0009_mediablob'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='urlrecipe',
+            name='short_url',
+            field=models.CharField(max_length=128, unique=True, verbose_name='Короткий URL.'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:18
+
+from django.conf import settings
+from django.db import migrations, models
+import foods.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foods', '0011_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favorite',
+            name='recipe',
+            field=models.ForeignKey(on_delete=foods.deletion.cascade_relations, related_name='favorites', to='foods.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='user',
+            field=models.ForeignKey(on_delete=foods.deletion.cascade_relations, related_name='favorites', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='recipe',
+            field=models.ForeignKey(on_delete=foods.deletion.cascade_relations, related_name='shopping_carts', to='foods.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(on_delete=foods.deletion.cascade_relations, related_name='shopping_carts', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
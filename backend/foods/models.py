@@ -1,6 +1,21 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connection, models
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+    When,
+    Window
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
 from backend.constants import (
     INGREDIENT_NAME_MAX_LENGTH,
@@ -10,6 +25,8 @@ from backend.constants import (
     TAG_NAME_MAX_LENGTH,
     TAG_SLUG_MAX_LENGTH
 )
+from users.models import Follow
+from .deletion import cascade_relations
 
 
 User = get_user_model()
@@ -37,6 +54,20 @@ class Tag(models.Model):
         return self.name[:NAME_LENGTH]
 
 
+class IngredientQuerySet(models.QuerySet):
+    """QuerySet ингредиентов."""
+
+    def search(self, name):
+        """Поиск по вхождению: сначала совпадения с начала названия."""
+        return self.filter(name__icontains=name).annotate(
+            rank=Case(
+                When(name__istartswith=name, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('rank', 'name')
+
+
 class Ingredient(models.Model):
     """Модель ингридиентов."""
 
@@ -49,6 +80,8 @@ class Ingredient(models.Model):
         max_length=MEASUREMENT_UNIT_MAX_LENGTH
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'ингридиент'
         verbose_name_plural = 'Ингридиенты'
@@ -63,6 +96,67 @@ class Ingredient(models.Model):
         return self.name[:NAME_LENGTH]
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов."""
+
+    def for_user(self, user=None):
+        """Подгрузка связанных данных и флагов пользователя для выдачи.
+
+        Без user флаги не считаются в запросе и равны False, их
+        проставляет сериализатор по связям пользователя из контекста.
+        """
+        if user is not None and user.is_authenticated:
+            is_favorited = Exists(
+                Favorite.objects.filter(recipe=OuterRef('pk'), user=user)
+            )
+            is_in_shopping_cart = Exists(
+                ShoppingCart.objects.filter(recipe=OuterRef('pk'), user=user)
+            )
+            is_subscribed = Exists(
+                Follow.objects.filter(following=OuterRef('pk'), user=user)
+            )
+        else:
+            is_favorited = is_in_shopping_cart = is_subscribed = Value(
+                False,
+                output_field=BooleanField()
+            )
+        return self.annotate(
+            is_favorited=is_favorited,
+            is_in_shopping_cart=is_in_shopping_cart
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            ),
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate(is_subscribed=is_subscribed)
+            )
+        )
+
+    def limit_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора."""
+        if connection.features.supports_over_clause:
+            sql, params = self.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=(F('created_at').desc(), F('id').desc())
+                )
+            ).order_by().values('id', 'row_number').query.sql_with_params()
+            return self.filter(id__in=RawSQL(
+                f'SELECT "id" FROM ({sql}) AS "numbered" '
+                'WHERE "row_number" <= %s',
+                (*params, limit)
+            ))
+        return self.filter(id__in=Subquery(
+            self.model.objects.filter(
+                author_id=OuterRef('author_id')
+            ).values('id')[:limit]
+        ))
+
+
 class Recipe(models.Model):
     """Модель рецептов."""
 
@@ -87,6 +181,7 @@ class Recipe(models.Model):
     )
     tags = models.ManyToManyField(
         Tag,
+        through='TagRecipe',
         verbose_name='Теги'
     )
     author = models.ForeignKey(
@@ -102,12 +197,40 @@ class Recipe(models.Model):
         'Изображение',
         upload_to='recipes/images/'
     )
+    image_variants = models.JSONField(
+        'Размеры изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Количество добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    carts_count = models.PositiveIntegerField(
+        'Количество добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-created_at',)
         default_related_name = 'recipes'
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='recipe_created_at_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-created_at'],
+                name='recipe_author_created_at_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name[:NAME_LENGTH]
@@ -122,7 +245,11 @@ class URLRecipe(models.Model):
         verbose_name='Рецепт'
     )
     full_url = models.CharField('Полный URL.', max_length=128)
-    short_url = models.CharField('Короткий URL.', max_length=128)
+    short_url = models.CharField(
+        'Короткий URL.',
+        max_length=128,
+        unique=True
+    )
 
     class Meta:
         verbose_name = 'ссылка'
@@ -132,6 +259,36 @@ class URLRecipe(models.Model):
         return self.recipe[:NAME_LENGTH]
 
 
+class TagRecipe(models.Model):
+    """Связная модель тегов рецепта."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        verbose_name='Тег',
+    )
+
+    class Meta:
+        db_table = 'foods_recipe_tags'
+        verbose_name = 'тег рецепта'
+        verbose_name_plural = 'Теги рецептов'
+        unique_together = ('recipe', 'tag')
+        indexes = [
+            models.Index(
+                fields=['tag', 'recipe'],
+                name='tagrecipe_tag_recipe_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.tag}'
+
+
 class IngredientRecipe(models.Model):
     """Связная модель ингредиентов в рецепте."""
 
@@ -174,14 +331,18 @@ class RecipesIn(models.Model):
 
     user = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        on_delete=cascade_relations,
         verbose_name='Пользователь'
     )
     recipe = models.ForeignKey(
         Recipe,
-        on_delete=models.CASCADE,
+        on_delete=cascade_relations,
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
 
     class Meta:
         abstract = True
@@ -221,3 +382,96 @@ class ShoppingCart(RecipesIn):
 
     def __str__(self):
         return f'{self.recipe} рецепт в списке покупок у {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента в списке покупок пользователя.
+
+    Меняется на разницу количеств при добавлении и удалении рецептов из
+    списка покупок и при изменении ингредиентов этих рецептов. Сверяется
+    и восстанавливается командой rebuild_shopping_lists.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField('Количество', default=0)
+
+    class Meta:
+        verbose_name = 'ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_ingredient'
+            )
+        ]
+        default_related_name = 'shopping_list_items'
+
+    def __str__(self):
+        return f'{self.ingredient} в списке покупок у {self.user}'
+
+
+class RecipeRanking(models.Model):
+    """Материализованный рейтинг рецептов.
+
+    Пересчитывается командой refresh_ranking. Позиции popular_rank и
+    trending_rank уникальны, поэтому по ним работает курсорная пагинация.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Рецепт'
+    )
+    popular_score = models.FloatField('Популярность')
+    trending_score = models.FloatField('Набирает популярность')
+    popular_rank = models.PositiveIntegerField(
+        'Позиция по популярности',
+        unique=True
+    )
+    trending_rank = models.PositiveIntegerField(
+        'Позиция по набору популярности',
+        unique=True
+    )
+
+    class Meta:
+        verbose_name = 'рейтинг рецепта'
+        verbose_name_plural = 'Рейтинг рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}'
+
+
+class MediaBlob(models.Model):
+    """Файл в хранилище с адресацией по содержимому.
+
+    refcount - число ссылок на файл из рецептов, их размеров и аватаров.
+    Файлы без ссылок удаляет команда collect_media.
+    """
+
+    name = models.CharField('Имя файла', max_length=255, unique=True)
+    refcount = models.PositiveIntegerField('Количество ссылок', default=0)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+        indexes = [
+            models.Index(
+                fields=['refcount', 'updated_at'],
+                name='mediablob_refcount_idx'
+            )
+        ]
+
+    def __str__(self):
+        return self.name
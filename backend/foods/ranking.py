@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.constants import (
+    RANKING_BATCH_SIZE,
+    RANKING_CART_WEIGHT,
+    RANKING_FAVORITE_WEIGHT,
+    RANKING_POPULAR_HALF_LIFE_DAYS,
+    RANKING_TRENDING_HALF_LIFE_DAYS
+)
+from .cache import RECIPES_LIST_VERSION_KEY, bump_on_commit
+from .models import Favorite, Recipe, RecipeRanking, ShoppingCart
+
+
+def collect_scores(scores, model, weight, today):
+    """Добавление затухающих по времени оценок из model в scores.
+
+    Добавления группируются по дням, поэтому из базы читается по одной
+    строке на пару рецепт-день, а не по строке на каждое добавление.
+    """
+    rows = model.objects.annotate(
+        day=TruncDate('created_at')
+    ).order_by().values_list('recipe_id', 'day').annotate(
+        count=Count('pk')
+    )
+    for recipe_id, day, count in rows.iterator():
+        age = max((today - day).days, 0)
+        score = scores[recipe_id]
+        score[0] += weight * count * 0.5 ** (
+            age / RANKING_POPULAR_HALF_LIFE_DAYS
+        )
+        score[1] += weight * count * 0.5 ** (
+            age / RANKING_TRENDING_HALF_LIFE_DAYS
+        )
+
+
+def refresh_ranking():
+    """Пересчет таблицы рейтинга рецептов, возвращает число строк."""
+    today = timezone.now().date()
+    scores = defaultdict(lambda: [0.0, 0.0])
+    collect_scores(scores, Favorite, RANKING_FAVORITE_WEIGHT, today)
+    collect_scores(scores, ShoppingCart, RANKING_CART_WEIGHT, today)
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True).iterator())
+    popular = sorted(
+        recipe_ids,
+        key=lambda pk: (scores[pk][0], pk),
+        reverse=True
+    )
+    trending = sorted(
+        recipe_ids,
+        key=lambda pk: (scores[pk][1], pk),
+        reverse=True
+    )
+    trending_ranks = {pk: rank for rank, pk in enumerate(trending, 1)}
+    with transaction.atomic():
+        RecipeRanking.objects.all().delete()
+        RecipeRanking.objects.bulk_create(
+            (
+                RecipeRanking(
+                    recipe_id=pk,
+                    popular_score=scores[pk][0],
+                    trending_score=scores[pk][1],
+                    popular_rank=rank,
+                    trending_rank=trending_ranks[pk]
+                )
+                for rank, pk in enumerate(popular, 1)
+            ),
+            batch_size=RANKING_BATCH_SIZE
+        )
+    bump_on_commit([RECIPES_LIST_VERSION_KEY])
+    return len(recipe_ids)
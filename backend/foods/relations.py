@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.constants import RESPONSE_CACHE_TIMEOUT
+from users.models import Follow
+from .cache import bump_on_commit, get_version, relations_version_key
+from .models import Favorite, Recipe, ShoppingCart, User
+from .shopping_lists import add_to_shopping_list, remove_from_shopping_list
+from .signals import COUNTER_FIELDS, bulk_relations, change_counters
+
+
+def get_user_relations(user):
+    """Связи пользователя для флагов в ответах API.
+
+    favorites и carts - id рецептов в избранном и в списке покупок,
+    follows - id авторов в подписках. Кешируются по версии пользователя,
+    которую меняют сигналы Favorite, ShoppingCart и Follow.
+    """
+    version = get_version(relations_version_key(user.pk))
+    key = f'relations:{user.pk}:{version}'
+    relations = cache.get(key)
+    if relations is None:
+        relations = {
+            'favorites': set(Favorite.objects.filter(
+                user=user
+            ).values_list('recipe_id', flat=True)),
+            'carts': set(ShoppingCart.objects.filter(
+                user=user
+            ).values_list('recipe_id', flat=True)),
+            'follows': set(Follow.objects.filter(
+                user=user
+            ).values_list('following_id', flat=True)),
+        }
+        cache.set(key, relations, RESPONSE_CACHE_TIMEOUT)
+    relations['version'] = version
+    return relations
+
+
+def lock_user_relations(user):
+    """Блокировка строки пользователя до конца транзакции.
+
+    Через нее проходят все изменения избранного и списка покупок
+    пользователя, поэтому прочитанные под ней связи не изменятся.
+    """
+    list(User.objects.select_for_update().filter(
+        pk=user.pk
+    ).order_by().values_list('pk', flat=True))
+
+
+@transaction.atomic
+def update_user_relations(model, user, add=(), remove=()):
+    """Пакетное добавление и удаление рецептов в избранном или покупках.
+
+    Добавление идет одним INSERT с пропуском конфликтов, удаление - одним
+    DELETE по id рецептов. Поштучные обработчики сигналов при этом
+    не работают, поэтому счетчики рецептов, список покупок и версия связей
+    пользователя меняются здесь же. Возвращает статусы по каждому id.
+    """
+    lock_user_relations(user)
+    recipes = set(Recipe.objects.filter(
+        pk__in=[*add, *remove]
+    ).order_by().values_list('pk', flat=True))
+    # Найденные связи заблокированы, поэтому DELETE ниже удалит ровно их.
+    current = set(model.objects.select_for_update().filter(
+        user=user,
+        recipe_id__in=recipes
+    ).values_list('recipe_id', flat=True))
+    added = [pk for pk in add if pk in recipes and pk not in current]
+    removed = [pk for pk in remove if pk in current]
+    field = COUNTER_FIELDS[model]
+    if added:
+        model.objects.bulk_create(
+            (model(user=user, recipe_id=pk) for pk in added),
+            ignore_conflicts=True
+        )
+        change_counters(Recipe, added, field, 1)
+        if model is ShoppingCart:
+            add_to_shopping_list(user.pk, added)
+    if removed:
+        if model is ShoppingCart:
+            remove_from_shopping_list(user.pk, removed)
+        token = bulk_relations.set(True)
+        try:
+            model.objects.filter(user=user, recipe_id__in=removed).delete()
+        finally:
+            bulk_relations.reset(token)
+        change_counters(Recipe, removed, field, -1)
+    if added or removed:
+        bump_on_commit([relations_version_key(user.pk)])
+    return {
+        'add': [
+            {
+                'id': pk,
+                'status': (
+                    'not_found' if pk not in recipes
+                    else 'exists' if pk in current else 'added'
+                )
+            }
+            for pk in add
+        ],
+        'remove': [
+            {
+                'id': pk,
+                'status': (
+                    'not_found' if pk not in recipes
+                    else 'removed' if pk in current else 'absent'
+                )
+            }
+            for pk in remove
+        ],
+    }
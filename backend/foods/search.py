@@ -0,0 +1,133 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .cache import INGREDIENTS_VERSION_KEY, get_version
+from .models import Ingredient
+
+
+def normalize(name):
+    return name.casefold().replace('\n', ' ')
+
+
+class IndexSnapshot(NamedTuple):
+    """Неизменяемое состояние индекса одной версии каталога."""
+
+    version: int
+    items: list
+    by_id: dict
+    names: list
+    text: str
+    offsets: list
+
+
+EMPTY_SNAPSHOT = IndexSnapshot(None, [], {}, [], '', [])
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Названия хранятся отсортированным списком для поиска по префиксу
+    через bisect и одной строкой для поиска по вхождению через str.find.
+    Индекс перестраивается при смене версии каталога в кеше. Новое
+    состояние подменяется одним присваиванием snapshot, поэтому поиск
+    во время перестроения работает со старой версией целиком.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.snapshot = EMPTY_SNAPSHOT
+
+    def build(self, version):
+        items = sorted(
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit'),
+            key=lambda item: (normalize(item[1]), item[0])
+        )
+        names = [normalize(name) for _, name, _ in items]
+        offsets = []
+        position = 0
+        for name in names:
+            offsets.append(position)
+            position += len(name) + 1
+        self.snapshot = IndexSnapshot(
+            version=version,
+            items=items,
+            by_id={item[0]: item for item in items},
+            names=names,
+            text='\n'.join(names),
+            offsets=offsets
+        )
+
+    def refresh(self):
+        """Актуальное состояние индекса."""
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        if version != self.snapshot.version:
+            with self._lock:
+                if version != self.snapshot.version:
+                    self.build(version)
+        return self.snapshot
+
+    def search(self, name='', limit=None):
+        """Ингредиенты, в названии которых есть name.
+
+        Сначала идут совпадения с начала названия, затем остальные,
+        внутри групп - по алфавиту.
+        """
+        snapshot = self.refresh()
+        query = normalize(name)
+        if not query:
+            found = range(len(snapshot.items))
+        else:
+            found = self._find(snapshot, query, limit)
+        if limit is not None:
+            found = found[:limit]
+        items = snapshot.items
+        return [
+            {
+                'id': items[index][0],
+                'name': items[index][1],
+                'measurement_unit': items[index][2]
+            }
+            for index in found
+        ]
+
+    def in_bulk(self, ids):
+        """Ингредиенты по id без запроса к базе."""
+        by_id = self.refresh().by_id
+        return {
+            pk: Ingredient(
+                id=pk,
+                name=by_id[pk][1],
+                measurement_unit=by_id[pk][2]
+            )
+            for pk in ids
+            if pk in by_id
+        }
+
+    def _find(self, snapshot, query, limit):
+        names, text, offsets = snapshot.names, snapshot.text, snapshot.offsets
+        start = bisect_left(names, query)
+        end = bisect_right(names, query + '\U0010ffff', start)
+        found = list(range(start, end))
+        position = text.find(query)
+        while position != -1 and (limit is None or len(found) < limit):
+            index = bisect_right(offsets, position) - 1
+            if not start <= index < end:
+                found.append(index)
+            position = text.find(
+                query,
+                offsets[index] + len(names[index]) + 1
+            )
+        return found
+
+
+ingredient_index = IngredientIndex()
+
+
+def ingredients_in_bulk(ids):
+    """Ингредиенты по id из индекса, если он включен."""
+    if not settings.INGREDIENT_INDEX_ENABLED:
+        return {}
+    return ingredient_index.in_bulk(ids)
@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    Sum,
+    Value,
+    When
+)
+from django.db.models.functions import Greatest
+
+from backend.constants import SHOPPING_LIST_BATCH_SIZE
+from .cache import bump_on_commit, cart_version_key
+from .models import IngredientRecipe, ShoppingCart, ShoppingListItem
+
+
+def ingredient_amounts(recipe_ids):
+    """Суммарные количества ингредиентов рецептов по id ингредиента."""
+    return dict(IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values_list('ingredient_id').annotate(
+        total=Sum('amount')
+    ))
+
+
+def expected_shopping_lists(user_ids):
+    """Списки покупок пользователей, посчитанные по их рецептам."""
+    lists = defaultdict(dict)
+    rows = IngredientRecipe.objects.filter(
+        recipe__shopping_carts__user_id__in=user_ids
+    ).order_by().values_list(
+        'recipe__shopping_carts__user_id',
+        'ingredient_id'
+    ).annotate(total=Sum('amount'))
+    for user_id, ingredient_id, total in rows:
+        lists[user_id][ingredient_id] = total
+    return lists
+
+
+def change_shopping_lists(user_ids, deltas):
+    """Изменение списков покупок пользователей на deltas.
+
+    deltas - разница количеств по id ингредиента, одна для всех
+    пользователей. Новые строки создаются с нулем, затем все меняются
+    одним UPDATE, строки с нулевым количеством удаляются. Версии списков
+    покупок пользователей меняются после коммита.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0
+        ),
+        batch_size=SHOPPING_LIST_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids,
+        ingredient_id__in=deltas
+    )
+    items.update(total_amount=Greatest(
+        F('total_amount') + Case(
+            *(
+                When(ingredient_id=pk, then=Value(delta))
+                for pk, delta in deltas.items()
+            ),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    ))
+    if min(deltas.values()) < 0:
+        items.filter(total_amount=0).delete()
+    bump_on_commit([cart_version_key(pk) for pk in user_ids])
+
+
+def add_to_shopping_list(user_id, recipe_ids, sign=1):
+    """Добавление ингредиентов рецептов в список покупок пользователя."""
+    change_shopping_lists([user_id], {
+        pk: sign * amount
+        for pk, amount in ingredient_amounts(recipe_ids).items()
+    })
+
+
+def remove_from_shopping_list(user_id, recipe_ids):
+    """Вычитание ингредиентов рецептов из списка покупок пользователя."""
+    add_to_shopping_list(user_id, recipe_ids, sign=-1)
+
+
+def remove_from_shopping_lists(carts):
+    """Вычитание рецептов из списков покупок нескольких пользователей.
+
+    carts - id рецептов по id пользователя. Пользователи с одинаковым
+    набором рецептов меняются одним вызовом change_shopping_lists.
+    """
+    groups = defaultdict(list)
+    for user_id, recipe_ids in carts.items():
+        groups[frozenset(recipe_ids)].append(user_id)
+    for recipe_ids, user_ids in groups.items():
+        change_shopping_lists(user_ids, {
+            pk: -amount
+            for pk, amount in ingredient_amounts(recipe_ids).items()
+        })
+
+
+def recipe_amounts_changed(recipe_id, old, new):
+    """Перенос изменения ингредиентов рецепта в списки покупок с ним."""
+    deltas = {
+        pk: new.get(pk, 0) - old.get(pk, 0) for pk in old.keys() | new.keys()
+    }
+    if not any(deltas.values()):
+        return
+    change_shopping_lists(
+        list(ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)),
+        deltas
+    )
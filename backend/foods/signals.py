@@ -0,0 +1,219 @@
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from .cache import (
+    INGREDIENTS_VERSION_KEY,
+    RECIPES_LIST_VERSION_KEY,
+    SHORT_LINKS_VERSION_KEY,
+    TAGS_VERSION_KEY,
+    bump_on_commit,
+    recipe_version_key,
+    relations_version_key
+)
+from .images import schedule_variants, variants_outdated
+from .models import (
+    Favorite,
+    Ingredient,
+    IngredientRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TagRecipe,
+    URLRecipe,
+    User
+)
+from .shopping_lists import (
+    add_to_shopping_list,
+    remove_from_shopping_list,
+    remove_from_shopping_lists
+)
+from .storage import media_names, update_references
+
+COUNTER_FIELDS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'carts_count',
+}
+
+# Пакетное удаление из избранного и списка покупок само меняет счетчики
+# и списки покупок, поэтому поштучные обработчики его пропускают.
+bulk_relations = ContextVar('bulk_relations', default=False)
+
+MEDIA_FIELDS = {'image', 'image_variants', 'avatar'}
+
+
+def change_counter(model, pk, field, delta):
+    """Изменение денормализованного счетчика на delta."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def change_counters(model, pks, field, delta):
+    """Изменение денормализованного счетчика на delta одним запросом."""
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    bump_on_commit([INGREDIENTS_VERSION_KEY])
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(sender, **kwargs):
+    bump_on_commit([TAGS_VERSION_KEY])
+
+
+@receiver((post_save, post_delete), sender=URLRecipe)
+def short_links_changed(sender, **kwargs):
+    bump_on_commit([SHORT_LINKS_VERSION_KEY])
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    keys = [recipe_version_key(instance.pk)]
+    if created:
+        keys.append(RECIPES_LIST_VERSION_KEY)
+    bump_on_commit(keys)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver((post_save, post_delete), sender=TagRecipe)
+def recipes_list_changed(sender, instance, **kwargs):
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    bump_on_commit([recipe_version_key(recipe_id), RECIPES_LIST_VERSION_KEY])
+
+
+@receiver(m2m_changed, sender=TagRecipe)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    recipe_ids = (pk_set or ()) if reverse else [instance.pk]
+    bump_on_commit(
+        [recipe_version_key(pk) for pk in recipe_ids]
+        + [RECIPES_LIST_VERSION_KEY]
+    )
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    bump_on_commit([recipe_version_key(instance.recipe_id)])
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    if variants_outdated(instance):
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, COUNTER_FIELDS[sender], 1)
+        bump_on_commit([relations_version_key(instance.user_id)])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_removed(sender, instance, **kwargs):
+    if bulk_relations.get() or hasattr(instance, '_cascade'):
+        return
+    change_counter(Recipe, instance.recipe_id, COUNTER_FIELDS[sender], -1)
+    bump_on_commit([relations_version_key(instance.user_id)])
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_list_added(sender, instance, created, **kwargs):
+    if created:
+        add_to_shopping_list(instance.user_id, [instance.recipe_id])
+
+
+# До удаления, чтобы при каскадном удалении рецепта его ингредиенты
+# еще были в базе.
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_list_removed(sender, instance, **kwargs):
+    if bulk_relations.get() or hasattr(instance, '_cascade'):
+        return
+    remove_from_shopping_list(instance.user_id, [instance.recipe_id])
+
+
+@receiver(pre_delete, sender=Favorite)
+@receiver(pre_delete, sender=ShoppingCart)
+def relations_cascade_deleted(sender, instance, **kwargs):
+    """Каскадно удаляемые связи обрабатываются одним набором."""
+    cascade = getattr(instance, '_cascade', None)
+    if cascade is None or cascade.handled:
+        return
+    cascade.handled = True
+    # Счетчики удаляемых рецептов и списки покупок удаляемых
+    # пользователей менять незачем.
+    recipes = cascade.deleted_pks(Recipe)
+    users = cascade.deleted_pks(User)
+    removed = defaultdict(Counter)
+    carts = defaultdict(set)
+    for (model, _), row in cascade.rows.items():
+        if row.recipe_id not in recipes:
+            removed[model][row.recipe_id] += 1
+        if model is ShoppingCart and row.user_id not in users:
+            carts[row.user_id].add(row.recipe_id)
+    for model, counts in removed.items():
+        by_delta = defaultdict(list)
+        for pk, count in counts.items():
+            by_delta[-count].append(pk)
+        for delta, pks in by_delta.items():
+            change_counters(Recipe, pks, COUNTER_FIELDS[model], delta)
+    remove_from_shopping_lists(carts)
+    bump_on_commit([
+        relations_version_key(pk)
+        for pk in {row.user_id for row in cascade.rows.values()} - users
+    ])
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def remember_media(sender, instance, update_fields=None, **kwargs):
+    instance._old_media = None
+    if update_fields is not None and not MEDIA_FIELDS & set(update_fields):
+        return
+    old = None
+    if not instance._state.adding:
+        old = sender._base_manager.filter(pk=instance.pk).first()
+    instance._old_media = media_names(old) if old else []
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def update_media(sender, instance, **kwargs):
+    if instance._old_media is not None:
+        update_references(instance._old_media, media_names(instance))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def release_media(sender, instance, **kwargs):
+    update_references(media_names(instance), [])
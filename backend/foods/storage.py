@@ -0,0 +1,112 @@
+import hashlib
+import posixpath
+from collections import Counter, defaultdict
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from backend.constants import MEDIA_BATCH_SIZE
+from .models import MediaBlob
+
+
+def batches(names):
+    names = list(names)
+    for start in range(0, len(names), MEDIA_BATCH_SIZE):
+        yield names[start:start + MEDIA_BATCH_SIZE]
+
+
+def register_blobs(names, touch=True):
+    """Создание записей о файлах.
+
+    touch обновляет время изменения, чтобы только что сохраненный файл не
+    удалила сборка мусора до того, как на него появится ссылка.
+    """
+    for batch in batches(names):
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name) for name in batch],
+            ignore_conflicts=True
+        )
+        if touch:
+            MediaBlob.objects.filter(name__in=batch).update(
+                updated_at=timezone.now()
+            )
+
+
+def media_names(instance):
+    """Имена файлов, на которые ссылается объект, с повторами."""
+    names = [
+        getattr(instance, field.attname).name
+        for field in instance._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+    variants = getattr(instance, 'image_variants', None) or {}
+    names += [
+        name for variant, name in variants.items() if variant != 'source'
+    ]
+    return [name for name in names if name]
+
+
+def set_references(references, expression):
+    """Обновление refcount по Counter ссылок, expression(count)."""
+    by_count = defaultdict(list)
+    for name, count in references.items():
+        by_count[count].append(name)
+    now = timezone.now()
+    for count, names in by_count.items():
+        for batch in batches(names):
+            MediaBlob.objects.filter(name__in=batch).update(
+                refcount=expression(count),
+                updated_at=now
+            )
+
+
+def update_references(old_names, new_names):
+    """Перенос ссылок со старого набора файлов на новый."""
+    old, new = Counter(old_names), Counter(new_names)
+    added, removed = new - old, old - new
+    if added:
+        register_blobs(added, touch=False)
+        set_references(added, lambda count: F('refcount') + count)
+    if removed:
+        set_references(
+            removed,
+            lambda count: Greatest(F('refcount') - count, Value(0))
+        )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, где имя файла - SHA-256 его содержимого.
+
+    Одинаковые файлы хранятся один раз, а содержимое по URL никогда не
+    меняется, поэтому его можно кешировать как неизменяемое.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        # Запись обновляется до проверки наличия файла: collect_media
+        # удаляет только файлы, не изменявшиеся дольше min-age, и держит
+        # блокировку записи, пока не удалит файл.
+        register_blobs([name])
+        if not self.exists(name):
+            name = super().save(name, content, max_length)
+            register_blobs([name])
+        return name
+
+    def hashed_name(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        digest = sha256.hexdigest()
+        ext = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name), digest[:2], digest + ext
+        )
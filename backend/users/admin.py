@@ -12,6 +12,8 @@ class UserAdmin(BaseUserAdmin):
         'first_name',
         'last_name',
         'is_staff',
+        'recipes_count',
+        'subscribers_count',
     )
     search_fields = (
         'email',
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foods.cache import (
+    author_version_key,
+    bump_on_commit,
+    relations_version_key
+)
+from foods.signals import change_counter
+from .models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.following_id, 'subscribers_count', 1)
+        bump_on_commit([relations_version_key(instance.user_id)])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.following_id, 'subscribers_count', -1)
+    bump_on_commit([relations_version_key(instance.user_id)])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        bump_on_commit([author_version_key(instance.pk)])